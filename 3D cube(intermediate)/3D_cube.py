@@ -1,8 +1,42 @@
-import pygame
+import argparse
+import os
+import time
+
 import numpy as np
 import cv2
-import mediapipe as mp
+
+from benchmark import FrameTimer, NullTimer, print_summary, write_report
+from hand_tracking import INDEX_TIP, WRIST, HandTracker, LandmarkPredictor
+from landmark_log import LandmarkRecorder, LandmarkReplay
+from mesh import MeshRenderer, cube_mesh, load_obj
+from rasterizer import Rasterizer
+
+# Mesh to show (an OBJ file, otherwise the cube), landmark source and benchmark options
+parser = argparse.ArgumentParser(description="3D mesh controlled by hand gesture")
+parser.add_argument("--obj", default=None, help="Wavefront OBJ model to display instead of the cube")
+parser.add_argument("--solid", action="store_true", help="draw filled, shaded faces instead of a wireframe")
+parser.add_argument("--no-cull", action="store_true",
+                    help="keep back faces (for models with inconsistent winding)")
+parser.add_argument("--inference-width", type=int, default=320,
+                    help="downscale camera frames to this width before hand tracking")
+parser.add_argument("--no-preview", action="store_true", help="don't show the annotated camera window")
+parser.add_argument("--record", default=None, help="save the tracked landmarks to this file")
+parser.add_argument("--replay", default=None,
+                    help="play landmarks from a recording instead of the webcam (no MediaPipe needed)")
+parser.add_argument("--headless", action="store_true", help="render off-screen, no windows")
+parser.add_argument("--benchmark", type=int, default=0, metavar="FRAMES",
+                    help="render FRAMES frames of --replay as fast as possible and report timings")
+parser.add_argument("--report", default=None, help="write the benchmark summary as JSON")
+args = parser.parse_args()
+if args.benchmark and not args.replay:
+    parser.error("--benchmark needs --replay")
+
+if args.headless:
+    os.environ["SDL_VIDEODRIVER"] = "dummy"  # pygame renders to an off-screen surface
+
+import pygame
 from pygame import RESIZABLE
+
 pygame.init()
 
 WIDTH, HEIGHT = 1080, 720
@@ -14,125 +48,108 @@ BLUE = (0, 0, 255)
 DARK_BLUE = (0, 0, 150)
 LIGHT_BLUE = (100, 100, 255)
 
-# Initialize MediaPipe Hands
-mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=False,
-    max_num_hands=1,
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.5
-)
-mp_draw = mp.solutions.drawing_utils
-
-# Increased cube size by adjusting vertices
-vertices = np.array([
-    [-1.2, -1.2, -1.2], [1.2, -1.2, -1.2], [1.2, 1.2, -1.2], [-1.2, 1.2, -1.2],
-    [-1.2, -1.2, 1.2], [1.2, -1.2, 1.2], [1.2, 1.2, 1.2], [-1.2, 1.2, 1.2],
-])
-
-edges = [
-    (0, 1), (1, 2), (2, 3), (3, 0),
-    (4, 5), (5, 6), (6, 7), (7, 4),
-    (0, 4), (1, 5), (2, 6), (3, 7)
-]
-
-def rotate_x(angle):
-    rotation = np.array([
-        [1, 0, 0],
-        [0, np.cos(angle), -np.sin(angle)],
-        [0, np.sin(angle), np.cos(angle)]
-    ])
-    return rotation
-
-def rotate_y(angle):
-    rotation = np.array([
-        [np.cos(angle), 0, np.sin(angle)],
-        [0, 1, 0],
-        [-np.sin(angle), 0, np.cos(angle)]
-    ])
-    return rotation
-
-def rotate_z(angle):
-    rotation = np.array([
-        [np.cos(angle), -np.sin(angle), 0],
-        [np.sin(angle), np.cos(angle), 0],
-        [0, 0, 1]
-    ])
-    return rotation
-
-def calculate_scale_and_position(hand_landmarks):
-    wrist = hand_landmarks.landmark[0]
-    index_finger = hand_landmarks.landmark[8]
-    distance = np.sqrt((index_finger.x - wrist.x) ** 2 + (index_finger.y - wrist.y) ** 2)
-    scale = max(0.5, min(3.0, 1 / distance))  # Scale based on hand distance
-    position_x = (index_finger.x - 0.5) * WIDTH
-    position_y = (index_finger.y - 0.5) * HEIGHT
+mesh = load_obj(args.obj) if args.obj else cube_mesh(1.2)  # Increased cube size
+renderer = MeshRenderer(mesh, scale=100)
+rasterizer = Rasterizer(color=LIGHT_BLUE, background=WHITE, cull=not args.no_cull) if args.solid else None
+print(f"Loaded {mesh}")
+
+def calculate_scale_and_position(landmarks):
+    wrist = landmarks[WRIST]
+    index_finger = landmarks[INDEX_TIP]
+    distance = np.sqrt((index_finger[0] - wrist[0]) ** 2 + (index_finger[1] - wrist[1]) ** 2)
+    scale = max(0.5, min(3.0, 1 / max(distance, 1e-6)))  # Scale based on hand distance
+    position_x = (index_finger[0] - 0.5) * WIDTH
+    position_y = (index_finger[1] - 0.5) * HEIGHT
     return scale, position_x, position_y
 
-def project(point):
-    scale = 100
-    x = int(point[0] * scale) + WIDTH // 2
-    y = int(point[1] * scale) + HEIGHT // 2
-    return (x, y)
-
-cap = cv2.VideoCapture(0)
+# Benchmarks advance a simulated 60 FPS clock so every run sees the same landmarks
+simulated_time = 0.0
+now = (lambda: simulated_time) if args.benchmark else time.perf_counter
+
+recorder = LandmarkRecorder(args.record) if args.record and not args.replay else None
+if args.replay:
+    tracker = LandmarkReplay(args.replay, clock=now, loop=bool(args.benchmark)).start()
+    print(f"Replaying {len(tracker.records)} landmark records from {args.replay}")
+else:
+    # Camera capture and MediaPipe run on a worker thread; the loop below only
+    # picks up the newest landmarks, so it renders at 60 FPS whatever the tracker's speed
+    tracker = HandTracker(0, inference_width=args.inference_width,
+                          preview=not (args.no_preview or args.headless))
+    tracker.recorder = recorder
+    tracker.start()
+show_preview = not (args.no_preview or args.headless or args.replay)
+
+predictor = LandmarkPredictor()
+timer = FrameTimer() if args.benchmark else NullTimer()
+preview_sequence = -1
 angle_x = angle_y = angle_z = 0
 clock = pygame.time.Clock()
 
+timer.start()
 running = True
 while running:
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
             running = False
 
-    ret, frame = cap.read()
-    if not ret:
-        break
-
-    frame = cv2.flip(frame, 1)
-    frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    results = hands.process(frame_rgb)
-
-    screen.fill(WHITE)
-
-    if results.multi_hand_landmarks:
-        hand_landmarks = results.multi_hand_landmarks[0]  # Get first hand
-        # Draw hand landmarks
-        mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
-
-        scale, position_x, position_y = calculate_scale_and_position(hand_landmarks)
-        index_finger = hand_landmarks.landmark[8]
-        # Calculate rotation angles based on hand position
-        angle_x = (index_finger.y - 0.5) * 2 * np.pi
-        angle_y = (index_finger.x - 0.5) * 2 * np.pi
-
-    # Cube transformation 
-    rotation_x = rotate_x(angle_x)
-    rotation_y = rotate_y(angle_y)
-    rotation_z = rotate_z(angle_z)
-
-    transformed_vertices = []
-    for vertex in vertices:
-        rotated = np.dot(rotation_x, vertex)
-        rotated = np.dot(rotation_y, rotated)
-        rotated = np.dot(rotation_z, rotated)
-        transformed_vertices.append(rotated)
-
-    for edge in edges:
-        points = []
-        for vertex_index in edge:
-            point = project(transformed_vertices[vertex_index])
-            points.append(point)
-        pygame.draw.line(screen, BLUE, points[0], points[1], 2)
-
-    pygame.display.flip()
-    clock.tick(60)
-
-    cv2.imshow("Hand Gesture Control", frame)
-    if cv2.waitKey(1) & 0xFF == ord('q'):
-        break
-
-cap.release()
-cv2.destroyAllWindows()
+    if tracker.finished:
+        break  # camera closed or recording over
+
+    with timer.stage('update'):
+        # Smoothed landmarks, extrapolated to the time this frame is drawn
+        predictor.update(*tracker.latest())
+        landmarks = predictor.predict(now())
+
+        if landmarks is not None:
+            scale, position_x, position_y = calculate_scale_and_position(landmarks)
+            index_finger = landmarks[INDEX_TIP]
+            # Calculate rotation angles based on hand position
+            angle_x = float(index_finger[1] - 0.5) * 2 * np.pi
+            angle_y = float(index_finger[0] - 0.5) * 2 * np.pi
+
+        # Mesh transformation: one rotation matrix, one matrix multiply, one projection
+        rotated = renderer.update(angle_x, angle_y, angle_z)
+
+    with timer.stage('render'):
+        width, height = screen.get_size()
+        if rasterizer is not None:
+            # Filled faces rasterized in NumPy and blitted in one call
+            rasterizer.render(rotated, mesh.faces, renderer.scale, width, height)
+            rasterizer.blit(screen)
+        else:
+            screen.fill(WHITE)
+            for start, end in renderer.edge_segments(width, height).tolist():
+                pygame.draw.line(screen, BLUE, start, end, 2)
+        pygame.display.flip()
+    timer.frame_done()
+
+    if args.benchmark:
+        simulated_time += 1 / 60
+        if timer.frames >= args.benchmark:
+            break
+    else:
+        clock.tick(60)
+
+    if show_preview:
+        # Landmarks are drawn by the tracker; only show frames we haven't shown yet
+        _, _, sequence = tracker.latest()
+        frame = tracker.latest_frame()
+        if frame is not None and sequence != preview_sequence:
+            preview_sequence = sequence
+            cv2.imshow("Hand Gesture Control", frame)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            break
+
+timer.stop()
+tracker.stop()
+if recorder is not None:
+    recorder.close()
+    print(f"Saved {recorder.records} landmark records to {args.record}")
+if args.benchmark:
+    summary = timer.summary()
+    print_summary(summary)
+    if args.report:
+        write_report(summary, args.report)
+if show_preview:
+    cv2.destroyAllWindows()
 pygame.quit()
-hands.close()
\ No newline at end of file
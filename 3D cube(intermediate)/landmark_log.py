@@ -0,0 +1,119 @@
+"""Record MediaPipe hand landmarks to a compact binary file and replay them.
+
+File layout (little endian)::
+
+    header  b"LMK1" | uint8 landmark count | 3 bytes reserved
+    record  uint32 milliseconds since the first record
+            uint8  1 if a hand was found, else 0
+            int16[count * 3] x, y, z scaled by 16384   (only when found)
+
+A 21-landmark record is 131 bytes (5 without a hand), against 504 bytes
+as float64. Quantizing to 1/16384 of the frame keeps sub-pixel
+precision at any camera resolution.
+
+``LandmarkReplay`` has the same ``start/latest/latest_frame/finished/stop``
+interface as ``HandTracker``, so a recording can stand in for the webcam and
+MediaPipe, for example in CI or the headless benchmark.
+"""
+import struct
+import time
+
+import numpy as np
+
+MAGIC = b"LMK1"
+HEADER = struct.Struct("<4sB3x")
+RECORD = struct.Struct("<IB")
+SCALE = 16384.0
+
+
+class LandmarkRecorder:
+    def __init__(self, path, count=21):
+        self.count = count
+        self.file = open(path, "wb")
+        self.file.write(HEADER.pack(MAGIC, count))
+        self.start = None
+        self.records = 0
+
+    def write(self, timestamp, landmarks):
+        """Append one result, ``landmarks`` is a (count, 3) array or None"""
+        if self.start is None:
+            self.start = timestamp
+        millis = int(round((timestamp - self.start) * 1000))
+        self.file.write(RECORD.pack(millis, landmarks is not None))
+        if landmarks is not None:
+            values = np.clip(np.rint(np.asarray(landmarks) * SCALE), -32768, 32767)
+            self.file.write(values.astype("<i2").tobytes())
+        self.records += 1
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_landmarks(path):
+    """All records as (seconds, (count, 3) float32 array or None) tuples"""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a landmark recording")
+    payload = count * 3 * 2
+    records = []
+    offset = HEADER.size
+    while offset + RECORD.size <= len(data):
+        millis, found = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        landmarks = None
+        if found:
+            values = np.frombuffer(data, dtype="<i2", count=count * 3, offset=offset)
+            landmarks = (values.astype(np.float32) / SCALE).reshape(count, 3)
+            offset += payload
+        records.append((millis / 1000.0, landmarks))
+    return records
+
+
+class LandmarkReplay:
+    """Feeds recorded landmarks back on the original timeline.
+
+    ``clock`` returns the current time in seconds (``time.perf_counter`` by
+    default); a benchmark can pass a simulated clock to make replay
+    deterministic.
+    """
+
+    def __init__(self, path, clock=None, loop=False):
+        self.records = read_landmarks(path)
+        if not self.records:
+            raise ValueError(f"{path} contains no landmark records")
+        self.times = np.array([t for t, _ in self.records])
+        self.clock = clock or time.perf_counter
+        self.loop = loop
+        self.started = None
+        self.finished = False
+
+    def start(self):
+        self.started = self.clock()
+        return self
+
+    def latest(self):
+        """(landmarks or None, timestamp, sequence) of the newest record by now"""
+        elapsed = self.clock() - self.started
+        duration = self.times[-1]
+        laps = 0
+        if self.loop and duration > 0:
+            laps, elapsed = divmod(elapsed, duration)
+        elif elapsed > duration:
+            self.finished = True
+        index = max(int(np.searchsorted(self.times, elapsed, side="right")) - 1, 0)
+        timestamp = self.started + laps * duration + self.times[index]
+        return self.records[index][1], timestamp, int(laps) * len(self.records) + index
+
+    def latest_frame(self):
+        return None  # recordings hold no camera frames
+
+    def stop(self):
+        pass
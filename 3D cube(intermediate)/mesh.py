@@ -0,0 +1,135 @@
+"""Mesh data, OBJ loading and vectorized transform/projection for the 3D viewer.
+
+A mesh is a (N, 3) float array of vertices plus index arrays for edges and
+triangles. Rotation is one combined 3x3 matrix applied to every vertex in a
+single matrix multiply, and projection is one array operation, so the cost
+per frame is a few NumPy calls whatever the vertex count.
+"""
+import numpy as np
+
+
+class Mesh:
+    def __init__(self, vertices, faces=None, edges=None):
+        self.vertices = np.ascontiguousarray(vertices, dtype=np.float32)
+        self.faces = (np.zeros((0, 3), dtype=np.int32) if faces is None
+                      else np.asarray(faces, dtype=np.int32).reshape(-1, 3))
+        if edges is None:
+            edges = edges_from_faces(self.faces)
+        self.edges = np.asarray(edges, dtype=np.int32).reshape(-1, 2)
+
+    def __repr__(self):
+        return f"Mesh({len(self.vertices)} vertices, {len(self.edges)} edges, {len(self.faces)} faces)"
+
+
+def edges_from_faces(faces):
+    """Unique undirected edges of a triangle index array"""
+    if len(faces) == 0:
+        return np.zeros((0, 2), dtype=np.int32)
+    edges = np.concatenate([faces[:, [0, 1]], faces[:, [1, 2]], faces[:, [2, 0]]])
+    edges.sort(axis=1)
+    return np.unique(edges, axis=0)
+
+
+def cube_mesh(size=1.2):
+    """The original hard-coded cube, with triangles for filled rendering"""
+    s = size
+    vertices = [
+        [-s, -s, -s], [s, -s, -s], [s, s, -s], [-s, s, -s],
+        [-s, -s, s], [s, -s, s], [s, s, s], [-s, s, s],
+    ]
+    edges = [
+        (0, 1), (1, 2), (2, 3), (3, 0),
+        (4, 5), (5, 6), (6, 7), (7, 4),
+        (0, 4), (1, 5), (2, 6), (3, 7)
+    ]
+    # Two triangles per side, counter-clockwise seen from outside
+    faces = [
+        (0, 3, 2), (0, 2, 1),  # back   (z = -s)
+        (4, 5, 6), (4, 6, 7),  # front  (z = +s)
+        (0, 1, 5), (0, 5, 4),  # bottom (y = -s)
+        (3, 7, 6), (3, 6, 2),  # top    (y = +s)
+        (0, 4, 7), (0, 7, 3),  # left   (x = -s)
+        (1, 2, 6), (1, 6, 5),  # right  (x = +s)
+    ]
+    return Mesh(vertices, faces, edges)
+
+
+def load_obj(path, radius=2.0):
+    """Load a Wavefront OBJ file (v and f records only).
+
+    Polygons are fan-triangulated, negative (relative) indices are supported
+    and texture/normal indices are ignored. The model is centred and scaled
+    so its furthest vertex sits ``radius`` units from the origin, about the
+    size of the default cube.
+    """
+    vertices, faces = [], []
+    with open(path) as f:
+        for line in f:
+            if line.startswith("v "):
+                vertices.append(line.split()[1:4])
+            elif line.startswith("f "):
+                count = len(vertices)
+                index = [int(part.split("/")[0]) for part in line.split()[1:]]
+                index = [i - 1 if i > 0 else count + i for i in index]
+                for k in range(1, len(index) - 1):
+                    faces.append((index[0], index[k], index[k + 1]))
+    if not vertices:
+        raise ValueError(f"No vertices found in {path}")
+
+    vertices = np.array(vertices, dtype=np.float32)
+    vertices -= (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    furthest = np.linalg.norm(vertices, axis=1).max()
+    if furthest > 0:
+        vertices *= radius / furthest
+    return Mesh(vertices, faces)
+
+
+def rotation_matrix(angle_x, angle_y, angle_z):
+    """Combined rotation Rz @ Ry @ Rx (x applied first, as in the original loop)"""
+    cx, sx = np.cos(angle_x), np.sin(angle_x)
+    cy, sy = np.cos(angle_y), np.sin(angle_y)
+    cz, sz = np.cos(angle_z), np.sin(angle_z)
+    rx = np.array([[1, 0, 0], [0, cx, -sx], [0, sx, cx]])
+    ry = np.array([[cy, 0, sy], [0, 1, 0], [-sy, 0, cy]])
+    rz = np.array([[cz, -sz, 0], [sz, cz, 0], [0, 0, 1]])
+    return (rz @ ry @ rx).astype(np.float32)
+
+
+def transform(vertices, matrix, out=None):
+    """Rotate all (N, 3) vertices at once"""
+    return np.matmul(vertices, matrix.T, out=out)
+
+
+def project(points, scale, center_x, center_y):
+    """Orthographic projection of (N, 3) points to (N, 2) integer pixels"""
+    projected = points[:, :2] * scale
+    projected[:, 0] += center_x
+    projected[:, 1] += center_y
+    return projected.astype(np.int32)
+
+
+class MeshRenderer:
+    """Keeps per-frame work to matrix products over preallocated arrays.
+
+    The rotation matrix is only rebuilt when an angle changes.
+    """
+
+    def __init__(self, mesh, scale=100):
+        self.mesh = mesh
+        self.scale = scale
+        self.angles = None
+        self.matrix = None
+        self.rotated = np.empty_like(mesh.vertices)
+
+    def update(self, angle_x, angle_y, angle_z):
+        """Rotate every vertex, returns the (N, 3) rotated array"""
+        angles = (angle_x, angle_y, angle_z)
+        if angles != self.angles:
+            self.angles = angles
+            self.matrix = rotation_matrix(*angles)
+        return transform(self.mesh.vertices, self.matrix, out=self.rotated)
+
+    def edge_segments(self, width, height):
+        """(E, 2, 2) screen coordinates of every edge's two endpoints"""
+        points = project(self.rotated, self.scale, width // 2, height // 2)
+        return points[self.mesh.edges]
@@ -0,0 +1,175 @@
+"""NumPy software rasterizer for filled, flat-shaded meshes.
+
+Instead of one ``pygame.draw`` call per edge or polygon, every visible
+triangle is rasterized with array operations:
+
+* backface culling: one cross product over all faces, faces pointing away
+  from the viewer are dropped before any pixel work;
+* all triangles are cut into one horizontal span per pixel row and the
+  spans are expanded into pixels with ``np.repeat``, so the cost follows
+  the covered area rather than the number of triangles; at most
+  ``pixel_budget`` pixels are expanded at once, so close-ups of large
+  meshes don't allocate unbounded temporary arrays;
+* a NumPy depth buffer (``np.minimum.at``) keeps the nearest fragment per
+  pixel, so overlapping geometry is resolved without z-sorting faces;
+* the finished colour buffer reaches the screen in a single
+  ``pygame.surfarray.blit_array`` call.
+
+The view is orthographic looking down +z, so smaller z is nearer.
+"""
+import numpy as np
+import pygame
+
+# Direction from the surface towards the light (viewer side, upper left)
+LIGHT = np.array([-0.3, -0.5, -1.0], dtype=np.float32)
+LIGHT /= np.linalg.norm(LIGHT)
+
+
+class Rasterizer:
+    def __init__(self, color=(100, 100, 255), background=(255, 255, 255),
+                 ambient=0.3, cull=True, pixel_budget=2_000_000):
+        self.color = np.array(color, dtype=np.float32)
+        self.background = np.array(background, dtype=np.uint8)
+        self.ambient = ambient
+        self.cull = cull                  # turn off for meshes with inconsistent winding
+        self.pixel_budget = pixel_budget  # most pixels expanded and depth-tested per batch
+        self.frame = None                 # (width, height, 3) colour buffer, surfarray layout
+        self.clear = None                 # background-filled copy of frame
+        self.zbuffer = None               # flat depth buffer, same pixel order as frame
+        self.visible_faces = 0
+
+    def buffer(self, width, height):
+        if self.frame is None or self.frame.shape[:2] != (width, height):
+            self.frame = np.empty((width, height, 3), dtype=np.uint8)
+            self.clear = np.empty_like(self.frame)
+            self.clear[:] = self.background
+        np.copyto(self.frame, self.clear)  # much faster than broadcasting the colour
+        return self.frame
+
+    def shade(self, normals):
+        """Flat colours (F, 3) for faces with the given normals"""
+        lengths = np.sqrt(np.einsum('ij,ij->i', normals, normals))
+        facing = normals @ LIGHT / np.maximum(lengths, 1e-12)
+        # Two-sided lighting when back faces can be seen
+        light = np.clip(facing, 0, 1) if self.cull else np.abs(facing)
+        intensity = self.ambient + (1 - self.ambient) * light
+        return (intensity[:, None] * self.color).astype(np.uint8)
+
+    def render(self, rotated, faces, scale, width, height):
+        """Rasterize rotated (N, 3) vertices into the colour buffer and return it"""
+        frame = self.buffer(width, height)
+        if len(faces) == 0:
+            self.visible_faces = 0
+            return frame
+
+        # Backface culling: only the z component of each normal is needed,
+        # faces whose normal points away from the viewer (+z) are dropped
+        corners = rotated[faces]
+        u = corners[:, 1] - corners[:, 0]
+        v = corners[:, 2] - corners[:, 0]
+        normal_z = u[:, 0] * v[:, 1] - u[:, 1] * v[:, 0]
+        keep = normal_z < 0 if self.cull else normal_z != 0
+        corners, u, v = corners[keep], u[keep], v[keep]
+        self.visible_faces = len(corners)
+        if not len(corners):
+            return frame
+        colors = self.shade(np.cross(u, v))
+
+        # Screen coordinates (F, 3, 2) and depth (F, 3) per triangle corner
+        xy = corners[:, :, :2] * scale
+        xy[:, :, 0] += width / 2
+        xy[:, :, 1] += height / 2
+        z = corners[:, :, 2]
+
+        # Depth test: nearest z per pixel wins. A later batch with a nearer
+        # fragment paints over an earlier one, a farther one fails the test.
+        zbuffer = self.depth_buffer(width, height)
+        pixel_colors = frame.reshape(-1, 3)
+        for pixels, depths, owners in self.fragments(xy, z, width, height, self.pixel_budget):
+            np.minimum.at(zbuffer, pixels, depths)
+            front = depths <= zbuffer[pixels]
+            pixel_colors[pixels[front]] = colors[owners[front]]
+        return frame
+
+    def depth_buffer(self, width, height):
+        if self.zbuffer is None or self.zbuffer.size != width * height:
+            self.zbuffer = np.empty(width * height, dtype=np.float32)
+        self.zbuffer.fill(np.inf)
+        return self.zbuffer
+
+    @staticmethod
+    def fragments(xy, z, width, height, pixel_budget=None):
+        """Covered pixels of all triangles as (flat pixel, depth, triangle) arrays.
+
+        Work is proportional to the covered area: each triangle is split into
+        one span per pixel row and the spans are expanded with ``np.repeat``,
+        whole spans at a time and about ``pixel_budget`` pixels per yielded batch.
+        """
+        ys = xy[:, :, 1]
+        # Pixel rows whose centre (row + 0.5) lies inside the triangle's y range
+        row0 = np.clip(np.ceil(ys.min(axis=1) - 0.5), 0, height).astype(np.int32)
+        row1 = np.clip(np.floor(ys.max(axis=1) - 0.5) + 1, 0, height).astype(np.int32)
+        rows = np.maximum(row1 - row0, 0)
+        if not rows.sum():
+            return
+
+        # Per triangle and edge: y range and x = intercept + slope * y
+        start, end = xy, xy[:, [1, 2, 0]]
+        y_low = np.minimum(start[:, :, 1], end[:, :, 1])
+        y_high = np.maximum(start[:, :, 1], end[:, :, 1])
+        dy = end[:, :, 1] - start[:, :, 1]
+        slope = (end[:, :, 0] - start[:, :, 0]) / np.where(dy == 0, 1, dy)
+        intercept = start[:, :, 0] - slope * start[:, :, 1]
+        y_high[dy == 0] = -np.inf  # horizontal edges never cross a row
+
+        # One entry per (triangle, row)
+        tri = np.repeat(np.arange(len(xy), dtype=np.int32), rows)
+        first_row = np.cumsum(rows) - rows
+        row = row0[tri] + np.arange(len(tri), dtype=np.int32) - first_row[tri]
+        yc = (row + 0.5).astype(np.float32)[:, None]
+
+        # Span of the row between the edges it crosses
+        x = intercept[tri] + slope[tri] * yc
+        crosses = (y_low[tri] <= yc) & (yc <= y_high[tri])
+        low, high = np.where(crosses, x, np.inf), np.where(crosses, x, -np.inf)
+        left = np.minimum(np.minimum(low[:, 0], low[:, 1]), low[:, 2])
+        right = np.maximum(np.maximum(high[:, 0], high[:, 1]), high[:, 2])
+
+        # Pixel columns whose centre is inside [left, right]
+        col0 = np.clip(np.ceil(left - 0.5), 0, width).astype(np.int32)
+        col1 = np.clip(np.floor(right - 0.5) + 1, 0, width).astype(np.int32)
+        cols = np.maximum(col1 - col0, 0)
+        if not cols.sum():
+            return
+
+        # Orthographic depth is linear in screen space: z = base + dzdx * x + dzdy * y
+        a, b, c = xy[:, 0], xy[:, 1], xy[:, 2]
+        za, zb, zc = z[:, 0], z[:, 1], z[:, 2]
+        area = (b[:, 0] - a[:, 0]) * (c[:, 1] - a[:, 1]) - (b[:, 1] - a[:, 1]) * (c[:, 0] - a[:, 0])
+        area = np.where(area == 0, 1e-12, area)
+        dzdx = ((zb - za) * (c[:, 1] - a[:, 1]) - (zc - za) * (b[:, 1] - a[:, 1])) / area
+        dzdy = ((zc - za) * (b[:, 0] - a[:, 0]) - (zb - za) * (c[:, 0] - a[:, 0])) / area
+        base = za - dzdx * (a[:, 0] - 0.5) - dzdy * (a[:, 1] - 0.5)  # sampled at pixel centres
+        # Per-row depth at column 0, then one multiply-add per pixel
+        row_depth = base[tri] + dzdy[tri] * row
+
+        ends = np.cumsum(cols)
+        budget = pixel_budget or int(ends[-1])
+        first = 0
+        while first < len(cols):
+            # Spans [first, last) hold at most budget pixels (at least one span)
+            done = ends[first - 1] if first else 0
+            last = max(int(np.searchsorted(ends, done + budget, side='right')), first + 1)
+            counts = cols[first:last]
+            span = first + np.repeat(np.arange(last - first, dtype=np.int32), counts)
+            px = col0[span] + np.arange(len(span), dtype=np.int32) - (ends[span] - cols[span] - done)
+            owner = tri[span]
+            depth = row_depth[span] + dzdx[owner] * px
+            first = last
+            if len(span):
+                # Flat index into the (width, height) buffer
+                yield px * height + row[span], depth.astype(np.float32), owner
+
+    def blit(self, surface):
+        """Copy the finished frame to the surface in one call"""
+        pygame.surfarray.blit_array(surface, self.frame)
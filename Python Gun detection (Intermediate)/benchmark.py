@@ -0,0 +1,92 @@
+"""Per-stage timing and JSON reports for benchmarking the detection loop."""
+import json
+import platform
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class StageTimer:
+    """Collect wall-clock durations for named stages of the detection loop"""
+
+    def __init__(self):
+        self.samples = {}
+        self.frames = 0
+        self.start_time = None
+        self.end_time = None
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(name, []).append(time.perf_counter() - start)
+
+    def start(self):
+        self.start_time = time.perf_counter()
+
+    def frame_done(self):
+        self.frames += 1
+
+    def stop(self):
+        self.end_time = time.perf_counter()
+
+    def summary(self):
+        elapsed = (self.end_time or time.perf_counter()) - (self.start_time or 0)
+        stages = {}
+        for name, values in self.samples.items():
+            ms = np.array(values) * 1000
+            stages[name] = {
+                'count': int(ms.size),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95)),
+                'p99_ms': float(np.percentile(ms, 99)),
+                'max_ms': float(ms.max()),
+            }
+        return {
+            'frames': self.frames,
+            'elapsed_s': elapsed,
+            'fps': self.frames / elapsed if elapsed > 0 else 0.0,
+            'stages': stages,
+        }
+
+
+class NullTimer:
+    """Drop-in for StageTimer when benchmarking is off"""
+
+    @contextmanager
+    def stage(self, name):
+        yield
+
+    def start(self):
+        pass
+
+    def frame_done(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def write_report(summary, path, extra=None):
+    """Write a benchmark summary plus run metadata as JSON"""
+    report = {
+        'timestamp': time.strftime("%Y-%m-%dT%H:%M:%S"),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+    }
+    report.update(extra or {})
+    report.update(summary)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    return report
+
+
+def print_summary(summary):
+    print(f"Frames: {summary['frames']}  Time: {summary['elapsed_s']:.2f}s  FPS: {summary['fps']:.1f}")
+    print(f"{'stage':<12}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, s in summary['stages'].items():
+        print(f"{name:<12}{s['p50_ms']:>10.2f}{s['p95_ms']:>10.2f}{s['p99_ms']:>10.2f}")
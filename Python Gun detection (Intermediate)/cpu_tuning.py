@@ -0,0 +1,146 @@
+"""CPU inference tuning for GPU-less deployments.
+
+- one thread budget shared by OpenCV and torch (intra-op and inter-op),
+  so the two libraries don't oversubscribe the cores
+- channels-last (NHWC) weights and inputs, which oneDNN convolutions run faster
+- a fixed input size plus warm-up passes, so the convolution primitives and
+  buffers are created once instead of on the first few live frames
+
+``compare_modes`` replays a clip through the float and the optimized model and
+reports throughput and how closely the optimized boxes match the float ones.
+"""
+import json
+import time
+import types
+
+import cv2
+import numpy as np
+import torch
+
+from tracker import box_iou
+
+
+def configure_threads(num_threads):
+    """Give OpenCV and torch the same thread budget"""
+    cv2.setNumThreads(num_threads)
+    torch.set_num_threads(num_threads)
+    try:
+        # Only allowed once, before any inter-op parallel work has started
+        torch.set_num_interop_threads(max(1, num_threads // 2))
+    except RuntimeError:
+        pass
+    print(f"🧵 CPU threads: opencv={cv2.getNumThreads()} torch intra-op={torch.get_num_threads()} "
+          f"inter-op={torch.get_num_interop_threads()}")
+
+
+def inner_module(model):
+    """The plain nn.Module inside YOLOv5's AutoShape/DetectMultiBackend, or None.
+
+    TorchScript/ONNX artifacts have no editable module, so the float-only
+    tweaks below are skipped for them.
+    """
+    backend = getattr(model, "model", None)
+    if backend is not None and getattr(backend, "pt", False):
+        return backend
+    return None
+
+
+def apply_channels_last(model):
+    backend = inner_module(model)
+    if backend is None:
+        print("channels-last skipped: model was not loaded from PyTorch weights (use --no-export)")
+        return False
+    network = backend.model
+    network.to(memory_format=torch.channels_last)
+
+    def channels_last_forward(self, x, *args, **kwargs):
+        return type(self).forward(self, x.contiguous(memory_format=torch.channels_last), *args, **kwargs)
+
+    # A bound method, not a closure over this module, so a deepcopy of the
+    # network rebinds it to the copy instead of the original
+    network.forward = types.MethodType(channels_last_forward, network)
+    return True
+
+
+@torch.no_grad()
+def warm_up(detector, runs=3):
+    """Run a few dummy frames at the pinned input size"""
+    width, height = detector.inference_size
+    dummy = np.zeros((height, width, 3), dtype=np.uint8)
+    for _ in range(runs):
+        detector.detect_weapons_array(dummy)
+
+
+def optimize_for_cpu(detector, num_threads=4, channels_last=True):
+    """Switch a WeaponDetectionSystem to the tuned CPU path.
+
+    ``num_threads=None`` keeps the thread settings already configured.
+    """
+    if num_threads:
+        detector.num_threads = num_threads
+        configure_threads(num_threads)
+    detector.model.eval()
+    if channels_last:
+        apply_channels_last(detector.model)
+    warm_up(detector)
+
+
+def match_rate(reference, boxes, iou_threshold=0.5):
+    """Share of reference boxes found again (same class, IoU >= threshold)"""
+    if len(reference) == 0:
+        return None
+    if len(boxes) == 0:
+        return 0.0
+    iou = box_iou(reference, boxes)
+    same_class = reference[:, None, 5] == boxes[None, :, 5]
+    return float(((iou >= iou_threshold) & same_class).any(axis=1).mean())
+
+
+def run_replay(detector, frames):
+    boxes, times = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        boxes.append(detector.detect_weapons_array(detector.preprocess(frame)))
+        times.append(time.perf_counter() - start)
+    return boxes, np.array(times) * 1000
+
+
+def compare_modes(detector, frames, output="cpu_compare.json", num_threads=4,
+                  channels_last=True):
+    """Replay frames through the float model, then the optimized one, and compare.
+
+    ``frames`` is a list of BGR frames (read from a replay clip beforehand so
+    decoding is not part of the timing). Threads are configured once up
+    front, so both runs get the same budget.
+    """
+    detector.num_threads = num_threads
+    configure_threads(num_threads)
+    warm_up(detector)
+    float_boxes, float_ms = run_replay(detector, frames)
+
+    optimize_for_cpu(detector, num_threads=None, channels_last=channels_last)
+    fast_boxes, fast_ms = run_replay(detector, frames)
+
+    recalls = [r for r in (match_rate(a, b) for a, b in zip(float_boxes, fast_boxes)) if r is not None]
+    extras = [r for r in (match_rate(b, a) for a, b in zip(float_boxes, fast_boxes)) if r is not None]
+    report = {
+        'frames': len(frames),
+        'threads': num_threads,
+        'channels_last': channels_last,
+        'float': {'fps': float(1000 / float_ms.mean()), 'p50_ms': float(np.percentile(float_ms, 50)),
+                  'p95_ms': float(np.percentile(float_ms, 95)),
+                  'detections': int(sum(len(b) for b in float_boxes))},
+        'optimized': {'fps': float(1000 / fast_ms.mean()), 'p50_ms': float(np.percentile(fast_ms, 50)),
+                      'p95_ms': float(np.percentile(fast_ms, 95)),
+                      'detections': int(sum(len(b) for b in fast_boxes))},
+        # Float model boxes as reference: share found again / share that are real matches
+        'box_recall_vs_float': float(np.mean(recalls)) if recalls else None,
+        'box_precision_vs_float': float(np.mean(extras)) if extras else None,
+    }
+    report['speedup'] = report['optimized']['fps'] / report['float']['fps']
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Float {report['float']['fps']:.1f} FPS -> optimized {report['optimized']['fps']:.1f} FPS "
+          f"(x{report['speedup']:.2f}), box recall vs float: {report['box_recall_vs_float']}")
+    print(f"Comparison written to {output}")
+    return report
@@ -0,0 +1,198 @@
+"""Indexed SQLite store of every detection.
+
+Until now the only record of a detection was a JPEG named by the second it
+was taken. EventStore keeps one row per detection (time, camera, class,
+confidence, box, track, snapshot path) in ``detected_weapons/events.db``.
+Rows are queued by the detection loop and inserted in batches by a
+background thread, one transaction per batch. An alarm snapshot is linked
+to the camera's detections around it whichever arrives first: rows already
+written are updated, later rows get the path as they are inserted. Indexes on time, (camera,
+time) and (class, time) keep range queries fast over months of alerts.
+
+Query from the command line::
+
+    python event_store.py --since 2026-01-01 --until 2026-02-01 --class knife --camera entrance
+"""
+import argparse
+import datetime
+import queue
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS detections (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    camera TEXT NOT NULL,
+    class TEXT NOT NULL,
+    confidence REAL NOT NULL,
+    x1 INTEGER, y1 INTEGER, x2 INTEGER, y2 INTEGER,
+    track INTEGER,
+    snapshot TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_detections_ts ON detections (ts);
+CREATE INDEX IF NOT EXISTS idx_detections_camera_ts ON detections (camera, ts);
+CREATE INDEX IF NOT EXISTS idx_detections_class_ts ON detections (class, ts);
+"""
+
+
+def connect(path):
+    db = sqlite3.connect(str(path), check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")     # readers don't block the writer
+    db.execute("PRAGMA synchronous=NORMAL")   # safe with WAL, far fewer fsyncs
+    db.executescript(SCHEMA)
+    return db
+
+
+class EventStore:
+    def __init__(self, path, batch_size=256, flush_interval=1.0, queue_size=50000):
+        self.path = str(path)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.items = queue.Queue(maxsize=queue_size)
+        self.dropped = 0
+        self.written = 0
+        self.snapshots = []  # (path, camera, start, end) still taking new rows, worker only
+        self.snapshot_grace = 5.0  # seconds after end that late rows are still linked
+        connect(self.path).close()  # create the schema up front
+        self.thread = threading.Thread(target=self.worker, name="event-store", daemon=True)
+        self.thread.start()
+
+    def record(self, detections, timestamp=None, camera="camera0"):
+        """Queue one row per detection dict, never blocks"""
+        timestamp = time.time() if timestamp is None else timestamp
+        for weapon in detections:
+            x1, y1, x2, y2 = weapon['box']
+            row = (timestamp, camera, weapon['class'], float(weapon['confidence']),
+                   int(x1), int(y1), int(x2), int(y2), weapon.get('track_id'), None)
+            self.put(('insert', row))
+
+    def attach_snapshot(self, camera, path, timestamp=None, window=2.0):
+        """Link a saved snapshot to the camera's detections of the last few seconds"""
+        timestamp = time.time() if timestamp is None else timestamp
+        self.put(('snapshot', (path, camera, timestamp - window, timestamp + 0.5)))
+
+    def put(self, item):
+        try:
+            self.items.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+
+    def worker(self):
+        db = connect(self.path)
+        running = True
+        while running:
+            batch = []
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self.items.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            if batch:
+                try:
+                    self.write(db, batch)
+                except sqlite3.Error as e:
+                    print(f"Error writing detection events: {e}")
+        db.close()
+
+    def write(self, db, batch):
+        now = time.time()
+        self.snapshots = [s for s in self.snapshots if s[3] + self.snapshot_grace >= now]
+        new_snapshots = [args for kind, args in batch if kind == 'snapshot']
+        self.snapshots.extend(new_snapshots)
+        # Rows in a snapshot's window carry its path from the start
+        inserts = [self.link_snapshot(row) for kind, row in batch if kind == 'insert']
+        with db:  # one transaction per batch
+            if inserts:
+                db.executemany("INSERT INTO detections (ts, camera, class, confidence, "
+                               "x1, y1, x2, y2, track, snapshot) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                               inserts)
+            # Rows written by earlier batches, before the snapshot was known
+            for args in new_snapshots:
+                db.execute("UPDATE detections SET snapshot = ? WHERE camera = ? "
+                           "AND ts BETWEEN ? AND ? AND snapshot IS NULL", args)
+        self.written += len(inserts)
+
+    def link_snapshot(self, row):
+        ts, camera = row[0], row[1]
+        for path, snapshot_camera, start, end in self.snapshots:
+            if snapshot_camera == camera and start <= ts <= end:
+                return row[:-1] + (path,)
+        return row
+
+    def close(self, timeout=5.0):
+        try:
+            self.items.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=timeout)
+
+
+def query(path, start=None, end=None, classes=None, camera=None, limit=1000):
+    """Detections in [start, end) (unix seconds), optionally filtered, newest first"""
+    sql = ["SELECT ts, camera, class, confidence, x1, y1, x2, y2, track, snapshot FROM detections WHERE 1=1"]
+    args = []
+    if start is not None:
+        sql.append("AND ts >= ?")
+        args.append(start)
+    if end is not None:
+        sql.append("AND ts < ?")
+        args.append(end)
+    if camera:
+        sql.append("AND camera = ?")
+        args.append(camera)
+    if classes:
+        sql.append(f"AND class IN ({','.join('?' * len(classes))})")
+        args.extend(classes)
+    sql.append("ORDER BY ts DESC LIMIT ?")
+    args.append(limit)
+    if not Path(path).exists():
+        raise FileNotFoundError(f"No event database at {path}")
+    # Read-only, so a mistyped path can never create an empty database
+    db = sqlite3.connect(f"{Path(path).resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        columns = ('timestamp', 'camera', 'class', 'confidence', 'x1', 'y1', 'x2', 'y2', 'track', 'snapshot')
+        return [dict(zip(columns, row)) for row in db.execute(" ".join(sql), args)]
+    finally:
+        db.close()
+
+
+def parse_time(value):
+    """Unix seconds from an ISO date/datetime or a plain number"""
+    if value is None:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.datetime.fromisoformat(value).timestamp()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search stored weapon detections")
+    parser.add_argument("--db", default="detected_weapons/events.db")
+    parser.add_argument("--since", default=None, help="ISO date/time or unix seconds")
+    parser.add_argument("--until", default=None, help="ISO date/time or unix seconds")
+    parser.add_argument("--class", dest="classes", action="append", default=[],
+                        help="only this class, can be repeated")
+    parser.add_argument("--camera", default=None)
+    parser.add_argument("--limit", type=int, default=100)
+    args = parser.parse_args()
+
+    try:
+        rows = query(args.db, parse_time(args.since), parse_time(args.until),
+                     classes=args.classes, camera=args.camera, limit=args.limit)
+    except FileNotFoundError as e:
+        parser.error(str(e))
+    for row in rows:
+        when = datetime.datetime.fromtimestamp(row['timestamp']).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
+        box = (row['x1'], row['y1'], row['x2'], row['y2'])
+        print(f"{when}  {row['camera']:<12} {row['class']:<10} {row['confidence']:.2f}  "
+              f"box={box} track={row['track']} {row['snapshot'] or ''}")
+    print(f"{len(rows)} detection(s)")
@@ -0,0 +1,160 @@
+"""Structured detection event stream for headless deployments.
+
+Each detection becomes one JSON line::
+
+    {"timestamp": 1718000000.123, "camera": "entrance", "class": "knife",
+     "confidence": 0.61, "box": [412, 220, 470, 301], "track": 3}
+
+Events are queued without blocking the detection loop and a background thread
+flushes them in batches to a sink: a JSONL file, a Unix domain socket or a
+TCP listener (for a central collector fed by many detector processes).
+A sink's ``write`` returns whether the batch was delivered.
+"""
+import json
+import queue
+import socket
+import threading
+import time
+
+
+class JsonlFileSink:
+    def __init__(self, path):
+        self.file = open(path, "a", buffering=1 << 16)
+
+    def write(self, data):
+        self.file.write(data.decode())
+        self.file.flush()
+        return True
+
+    def close(self):
+        self.file.close()
+
+
+class SocketSink:
+    """Stream JSON lines to a Unix socket path or a (host, port) TCP listener.
+
+    The connection is (re)opened lazily; if the collector is down a batch is
+    dropped and counted instead of stalling the detector.
+    """
+
+    def __init__(self, address, retry_interval=2.0):
+        self.address = address
+        self.retry_interval = retry_interval
+        self.sock = None
+        self.next_retry = 0.0
+        self.failed_batches = 0
+
+    def connect(self):
+        if isinstance(self.address, tuple):
+            sock = socket.create_connection(self.address, timeout=2.0)
+        else:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(2.0)
+            sock.connect(self.address)
+        self.sock = sock
+
+    def write(self, data):
+        if self.sock is None:
+            if time.time() < self.next_retry:
+                self.failed_batches += 1
+                return False
+            try:
+                self.connect()
+            except OSError as e:
+                print(f"Event collector {self.address} unavailable: {e}")
+                self.next_retry = time.time() + self.retry_interval
+                self.failed_batches += 1
+                return False
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self.sock.close()
+            self.sock = None
+            self.failed_batches += 1
+            return False
+        return True
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+
+
+def open_sink(spec):
+    """Sink from a command line value: unix:/path, tcp:host:port or a JSONL file path"""
+    if spec.startswith("unix:"):
+        return SocketSink(spec[len("unix:"):])
+    if spec.startswith("tcp:"):
+        host, port = spec[len("tcp:"):].rsplit(":", 1)
+        return SocketSink((host or "127.0.0.1", int(port)))
+    return JsonlFileSink(spec)
+
+
+class EventStream:
+    """Non-blocking, batched event publisher"""
+
+    def __init__(self, sink, camera="camera0", batch_size=64, flush_interval=0.5,
+                 queue_size=10000):
+        self.sink = sink
+        self.camera = camera
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.events = queue.Queue(maxsize=queue_size)
+        self.dropped = 0      # events not queued because the queue was full
+        self.undelivered = 0  # events in batches the sink failed to deliver
+        self.sent = 0
+        self.thread = threading.Thread(target=self.worker, name="event-stream", daemon=True)
+        self.thread.start()
+
+    def publish(self, detections, timestamp=None, camera=None):
+        """Queue one event per detection dict, never blocks"""
+        timestamp = time.time() if timestamp is None else timestamp
+        camera = self.camera if camera is None else camera
+        for weapon in detections:
+            event = {
+                'timestamp': round(timestamp, 3),
+                'camera': camera,
+                'class': weapon['class'],
+                'confidence': round(weapon['confidence'], 4),
+                'box': list(weapon['box']),
+                'track': weapon.get('track_id'),
+            }
+            try:
+                self.events.put_nowait(event)
+            except queue.Full:
+                self.dropped += 1
+
+    def worker(self):
+        running = True
+        while running:
+            batch = []
+            deadline = time.time() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    event = self.events.get(timeout=max(0.0, deadline - time.time()))
+                except queue.Empty:
+                    break
+                if event is None:
+                    running = False
+                    break
+                batch.append(event)
+            if batch:
+                data = "".join(json.dumps(event) + "\n" for event in batch).encode()
+                try:
+                    delivered = self.sink.write(data)
+                except Exception as e:
+                    print(f"Error writing events: {e}")
+                    delivered = False
+                if delivered:
+                    self.sent += len(batch)
+                else:
+                    self.undelivered += len(batch)
+
+    def close(self, timeout=5.0):
+        """Flush queued events and close the sink"""
+        try:
+            self.events.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=timeout)
+        self.sink.close()
+        print(f"Events: sent={self.sent} undelivered={self.undelivered} dropped={self.dropped}")
@@ -0,0 +1,196 @@
+"""Non-blocking evidence capture: snapshot + pre/post-event video clips.
+
+``cv2.imwrite`` used to run inside the detection loop, stalling the very frame
+the alarm fired on. Here the loop only copies each frame into a preallocated
+ring buffer (one memcpy, no allocation) and, when an alarm fires, queues a
+small job. A background thread reads the frames it needs back out of the ring
+and writes the snapshot and a short clip covering a few seconds before and
+after the event.
+"""
+import datetime
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class FrameRing:
+    """Fixed-memory ring of recent frames in preallocated slots.
+
+    Slots are allocated on the first frame, as many as fit in
+    ``budget_mb``. Every frame gets an increasing sequence number; a reader
+    asks for a sequence number and gets nothing back if it was overwritten.
+    """
+
+    def __init__(self, budget_mb=256):
+        self.budget_bytes = int(budget_mb * 1024 * 1024)
+        self.frames = None
+        self.seqs = None
+        self.timestamps = None
+        self.latest_seq = -1
+        self.lock = threading.Lock()
+        self.new_frame = threading.Condition(self.lock)
+
+    def allocate(self, frame):
+        slots = max(2, self.budget_bytes // frame.nbytes)
+        self.frames = np.empty((slots,) + frame.shape, dtype=frame.dtype)
+        self.seqs = np.full(slots, -1, dtype=np.int64)
+        self.timestamps = np.zeros(slots, dtype=np.float64)
+        print(f"Evidence ring buffer: {slots} frames ({slots * frame.nbytes / 1e6:.0f} MB)")
+
+    @property
+    def capacity(self):
+        return 0 if self.frames is None else len(self.frames)
+
+    def push(self, frame, timestamp=None):
+        """Copy frame into the next slot and return its sequence number"""
+        with self.lock:
+            if self.frames is None:
+                self.allocate(frame)
+            if frame.shape != self.frames.shape[1:]:
+                return self.latest_seq  # resolution changed mid-stream, skip
+            seq = self.latest_seq + 1
+            slot = seq % len(self.frames)
+            np.copyto(self.frames[slot], frame)
+            self.seqs[slot] = seq
+            self.timestamps[slot] = time.time() if timestamp is None else timestamp
+            self.latest_seq = seq
+            self.new_frame.notify_all()
+            return seq
+
+    def read(self, seq, out):
+        """Copy frame seq into out, returns its timestamp or None if it is gone"""
+        with self.lock:
+            if self.frames is None or seq < 0:
+                return None
+            slot = seq % len(self.frames)
+            if self.seqs[slot] != seq:
+                return None
+            np.copyto(out, self.frames[slot])
+            return self.timestamps[slot]
+
+    def oldest_seq_since(self, timestamp):
+        """Oldest still-buffered sequence number captured at or after timestamp"""
+        with self.lock:
+            if self.frames is None:
+                return 0
+            valid = (self.seqs >= 0) & (self.timestamps >= timestamp)
+            return int(self.seqs[valid].min()) if valid.any() else self.latest_seq
+
+    def wait_for(self, seq, timeout):
+        """Block until frame seq has been pushed, returns False on timeout"""
+        deadline = time.time() + timeout
+        with self.new_frame:
+            while self.latest_seq < seq:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                self.new_frame.wait(remaining)
+        return True
+
+
+class EvidenceWriter:
+    """Background writer for alarm snapshots and pre/post-event clips"""
+
+    def __init__(self, save_dir, ring=None, pre_seconds=3.0, post_seconds=3.0,
+                 queue_size=16, fourcc="mp4v"):
+        self.save_dir = save_dir
+        self.ring = ring or FrameRing()
+        self.pre_seconds = pre_seconds
+        self.post_seconds = post_seconds
+        self.fourcc = fourcc
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.dropped_jobs = 0
+        self.lost_frames = 0  # frames overwritten before the writer got to them
+        self.thread = threading.Thread(target=self.worker, name="evidence-writer", daemon=True)
+        self.thread.start()
+
+    def record(self, frame, timestamp=None):
+        """Called for every frame by the detection loop"""
+        return self.ring.push(frame, timestamp)
+
+    def trigger(self, label="weapon"):
+        """Queue a snapshot and clip for the newest frame, never blocks.
+
+        Returns the snapshot path, or None if the writer queue was full.
+        """
+        event_seq = self.ring.latest_seq
+        now = time.time()
+        stamp = datetime.datetime.fromtimestamp(now).strftime("%Y%m%d_%H%M%S_%f")[:-3]
+        job = {
+            'event_seq': event_seq,
+            'start_seq': self.ring.oldest_seq_since(now - self.pre_seconds),
+            'end_time': now + self.post_seconds,
+            'snapshot_path': str(self.save_dir / f"{label}_{stamp}.jpg"),
+            'clip_path': str(self.save_dir / f"{label}_{stamp}.mp4"),
+        }
+        try:
+            self.jobs.put_nowait(job)
+        except queue.Full:
+            self.dropped_jobs += 1
+            return None
+        return job['snapshot_path']
+
+    def worker(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                break
+            try:
+                self.write_job(job)
+            except Exception as e:
+                print(f"Error writing evidence: {e}")
+
+    def write_job(self, job):
+        ring = self.ring
+        if ring.capacity == 0:
+            return
+        buffer = np.empty(ring.frames.shape[1:], dtype=ring.frames.dtype)
+
+        # Snapshot of the frame the alarm fired on
+        if ring.read(job['event_seq'], buffer) is not None:
+            cv2.imwrite(job['snapshot_path'], buffer)
+
+        # Clip from the pre-event frames through the end of the post-event window
+        writer = None
+        seq = job['start_seq']
+        first_time = None
+        while True:
+            if not ring.wait_for(seq, timeout=max(0.5, job['end_time'] - time.time() + 0.5)):
+                break  # stream ended before the post-event window was full
+            timestamp = ring.read(seq, buffer)
+            seq += 1
+            if timestamp is None:
+                self.lost_frames += 1
+                continue
+            if timestamp > job['end_time']:
+                break
+            if writer is None:
+                first_time = timestamp
+                fps = self.estimate_fps()
+                height, width = buffer.shape[:2]
+                writer = cv2.VideoWriter(job['clip_path'], cv2.VideoWriter_fourcc(*self.fourcc),
+                                         fps, (width, height))
+            writer.write(buffer)
+        if writer is not None:
+            writer.release()
+            print(f"Saved evidence clip {job['clip_path']} "
+                  f"({job['end_time'] - first_time:.1f}s)")
+
+    def estimate_fps(self):
+        with self.ring.lock:
+            valid = self.ring.seqs >= 0
+            times = np.sort(self.ring.timestamps[valid])
+        if len(times) < 2 or times[-1] <= times[0]:
+            return 15.0
+        return float(np.clip((len(times) - 1) / (times[-1] - times[0]), 1.0, 60.0))
+
+    def close(self, timeout=10.0):
+        """Finish queued jobs and stop the writer thread"""
+        try:
+            self.jobs.put(None, timeout=timeout)
+        except queue.Full:
+            pass
+        self.thread.join(timeout=timeout)
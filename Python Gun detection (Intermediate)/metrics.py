@@ -0,0 +1,215 @@
+"""Low-overhead metrics for the detection loop.
+
+Per-stage timing histograms, counters (frames, skipped frames, alarms),
+inference batch sizes and callback gauges (queue depths, dropped frames) are
+kept in plain Python objects. Recording a sample is a bisect plus two integer
+increments under one uncontended lock, so the collector can stay on in
+production while several pipeline threads record and the exporters read.
+
+The numbers can be scraped from a local HTTP endpoint in Prometheus text
+format (``serve_http``) and/or appended periodically to a JSONL file
+(``start_jsonl``). ``Metrics`` also has the same ``stage()`` interface as
+``benchmark.StageTimer``, so it can be installed as ``detector.timer``.
+"""
+import json
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds, tuned for per-frame work between 0.1 ms and a few seconds
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                   0.1, 0.25, 0.5, 1.0, 2.5)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Metrics:
+    def __init__(self, prefix="weapon_detector"):
+        self.prefix = prefix
+        self.counters = {}
+        self.histograms = {}
+        self.callbacks = {}
+        self.stage_histograms = {}  # stage name -> Histogram, the hot path cache
+        self.lock = threading.Lock()  # recording threads vs. the exporter threads
+        self.started = time.time()
+        self.server = None
+        self.jsonl_thread = None
+        self.stop_event = threading.Event()
+
+    # --- recording -------------------------------------------------------
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def register(self, name, func, kind="gauge", **labels):
+        """Expose a value read on demand, e.g. a queue depth"""
+        with self.lock:
+            self.callbacks[(name, tuple(sorted(labels.items())))] = (func, kind)
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                histogram = self.stage_histograms.get(name)
+                if histogram is None:
+                    histogram = Histogram(LATENCY_BUCKETS)
+                    self.stage_histograms[name] = histogram
+                    self.histograms[("stage_seconds", (("stage", name),))] = histogram
+                histogram.observe(elapsed)
+
+    # StageTimer compatible hooks
+    def start(self):
+        pass
+
+    def frame_done(self):
+        self.inc("frames_total")
+
+    def stop(self):
+        pass
+
+    # --- export ----------------------------------------------------------
+
+    def collect(self):
+        """Consistent copies of (counters, callbacks, histograms) for the exporters.
+
+        Histograms come back as (key, buckets, counts, sum, count) tuples;
+        callbacks are only listed here and called outside the lock.
+        """
+        with self.lock:
+            counters = sorted(self.counters.items())
+            callbacks = sorted(self.callbacks.items(), key=lambda item: item[0])
+            histograms = [(key, h.buckets, list(h.counts), h.sum, h.count)
+                          for key, h in sorted(self.histograms.items(), key=lambda item: item[0])]
+        return counters, callbacks, histograms
+
+    def prometheus_text(self):
+        p = self.prefix
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                lines.append(f"# TYPE {p}_{name} {kind}")
+
+        counters, callbacks, histograms = self.collect()
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{p}_{name}{format_labels(labels)} {value}")
+        for (name, labels), (func, kind) in callbacks:
+            try:
+                value = func()
+            except Exception:
+                continue
+            header(name, kind)
+            lines.append(f"{p}_{name}{format_labels(labels)} {value}")
+        for (name, labels), buckets, counts, total, count in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, bucket_count in zip(buckets + ("+Inf",), counts):
+                cumulative += bucket_count
+                bucket_labels = labels + (("le", bound),)
+                lines.append(f"{p}_{name}_bucket{format_labels(bucket_labels)} {cumulative}")
+            lines.append(f"{p}_{name}_sum{format_labels(labels)} {total}")
+            lines.append(f"{p}_{name}_count{format_labels(labels)} {count}")
+        header("uptime_seconds", "gauge")
+        lines.append(f"{p}_uptime_seconds {time.time() - self.started:.1f}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """Plain dict of all metrics, used for JSONL output"""
+        def key_name(name, labels):
+            return name + "".join(f"|{k}={v}" for k, v in labels)
+
+        data = {'timestamp': time.time()}
+        counters, callbacks, histograms = self.collect()
+        for (name, labels), value in counters:
+            data[key_name(name, labels)] = value
+        for (name, labels), (func, _) in callbacks:
+            try:
+                data[key_name(name, labels)] = func()
+            except Exception:
+                pass
+        for (name, labels), buckets, counts, total, count in histograms:
+            data[key_name(name, labels)] = {
+                'count': count,
+                'sum': total,
+                'buckets': dict(zip([str(b) for b in buckets] + ["+Inf"], counts)),
+            }
+        return data
+
+    def serve_http(self, port=9108, host="127.0.0.1"):
+        """Serve /metrics in Prometheus text format from a daemon thread"""
+        metrics = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") not in ("", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # keep the console quiet
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, name="metrics-http", daemon=True).start()
+        print(f"📈 Metrics at http://{host}:{port}/metrics")
+
+    def start_jsonl(self, path, interval=10.0):
+        """Append a snapshot to path every interval seconds"""
+        def writer():
+            with open(path, "a") as f:
+                while not self.stop_event.wait(interval):
+                    f.write(json.dumps(self.snapshot()) + "\n")
+                    f.flush()
+                f.write(json.dumps(self.snapshot()) + "\n")
+
+        self.jsonl_thread = threading.Thread(target=writer, name="metrics-jsonl", daemon=True)
+        self.jsonl_thread.start()
+
+    def close(self):
+        self.stop_event.set()
+        if self.jsonl_thread is not None:
+            self.jsonl_thread.join(timeout=2.0)
+        if self.server is not None:
+            self.server.shutdown()
@@ -0,0 +1,147 @@
+"""Fast, offline model loading for the weapon detector.
+
+The old start-up path called ``torch.hub.load(..., force_reload=True)``, which
+downloads the YOLOv5 repository and weights on every launch. This loader
+instead:
+
+1. loads the local weights file (``yolov5n.pt`` ships with the project),
+2. on first run exports a TorchScript artifact for the given input size and
+   stores it in ``model_cache/`` under a key made from the weights hash,
+   input size and device,
+3. on later runs loads that artifact directly.
+
+The YOLOv5 code itself comes from a local checkout: ``$YOLOV5_DIR`` if set,
+otherwise the torch hub cache that any earlier ``torch.hub.load`` created.
+Without either, loading fails with instructions instead of going online.
+"""
+import hashlib
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import torch
+
+
+HUB_REPO = "ultralytics/yolov5"
+STRIDE = 32
+
+
+def make_divisible(x, divisor=STRIDE):
+    return int((x + divisor - 1) // divisor * divisor)
+
+
+def model_input_shape(inference_size):
+    """(height, width) YOLOv5 actually sees for a (width, height) frame size"""
+    width, height = inference_size
+    return make_divisible(height), make_divisible(width)
+
+
+def find_yolov5_repo():
+    """Return a local YOLOv5 checkout, or None if there is none"""
+    candidates = []
+    if os.environ.get("YOLOV5_DIR"):
+        candidates.append(Path(os.environ["YOLOV5_DIR"]))
+    candidates.append(Path(torch.hub.get_dir()) / "ultralytics_yolov5_master")
+    for path in candidates:
+        if (path / "hubconf.py").exists():
+            return path
+    return None
+
+
+def file_hash(path, length=12):
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:length]
+
+
+def artifact_path(weights, inference_size, device, cache_dir):
+    """Cache file name keyed by model, input size and device"""
+    height, width = model_input_shape(inference_size)
+    key = f"{Path(weights).stem}_{file_hash(weights)}_{width}x{height}_{device}"
+    return Path(cache_dir) / f"{key}.torchscript"
+
+
+def export_torchscript(repo, weights, inference_size, device, target):
+    """Export weights to TorchScript with the YOLOv5 exporter and move it to target"""
+    sys.path.insert(0, str(repo))
+    try:
+        import export  # YOLOv5's export.py from the local checkout
+        export.run(weights=str(weights), imgsz=model_input_shape(inference_size),
+                   include=("torchscript",), device="0" if device == "cuda" else "cpu")
+    finally:
+        sys.path.remove(str(repo))
+
+    exported = Path(weights).with_suffix(".torchscript")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    shutil.move(str(exported), str(target))
+    return target
+
+
+def require_yolov5_repo():
+    """The local YOLOv5 checkout; raise with set-up instructions if there is none"""
+    repo = find_yolov5_repo()
+    if repo is None:
+        raise FileNotFoundError(
+            "No local YOLOv5 checkout found and the detector doesn't download one at start-up. "
+            f"Either clone https://github.com/{HUB_REPO} and set YOLOV5_DIR to it, or fetch it "
+            f"once into the torch hub cache ({torch.hub.get_dir()}) with: "
+            f"python -c \"import torch; torch.hub.load('{HUB_REPO}', 'yolov5n', trust_repo=True)\"")
+    return repo
+
+
+def load_hub_model(repo, path):
+    """Load weights or an exported artifact wrapped in YOLOv5's AutoShape"""
+    return torch.hub.load(str(repo), "custom", path=str(path), source="local")
+
+
+def load_model(weights="yolov5n.pt", inference_size=(416, 312), device="cpu",
+               cache_dir="model_cache", export=True):
+    """Load the detector model, preferring a cached compiled artifact.
+
+    Returns (model, info) where info records which file was loaded and how
+    long start-up took. The artifact is traced for one frame of exactly
+    ``model_input_shape(inference_size)``: call it with that ``size`` and
+    use ``export=False`` for batched or tiled inference.
+    """
+    start = time.perf_counter()
+    weights = Path(weights)
+    if not weights.exists():
+        raise FileNotFoundError(f"Model weights not found: {weights}")
+
+    repo = require_yolov5_repo()
+    artifact = artifact_path(weights, inference_size, device, cache_dir)
+    source = "weights"
+
+    if not export:
+        # Plain weights asked for (channels-last, batched or tiled inference)
+        model = load_hub_model(repo, weights)
+    elif artifact.exists():
+        model = load_hub_model(repo, artifact)
+        source = "cache"
+    else:
+        exported = False
+        try:
+            print(f"🔄 Exporting {weights.name} to TorchScript (first run only)...")
+            export_torchscript(repo, weights, inference_size, device, artifact)
+            exported = True
+        except Exception as e:
+            print(f"TorchScript export failed, using plain weights: {e}")
+        if exported:
+            model = load_hub_model(repo, artifact)
+            source = "exported"
+        else:
+            model = load_hub_model(repo, weights)
+
+    elapsed = time.perf_counter() - start
+    info = {
+        'weights': str(weights),
+        'artifact': str(artifact) if source != "weights" else None,
+        'source': source,
+        'startup_s': elapsed,
+    }
+    print(f"✅ Model loaded from {source} ({info['artifact'] or weights}) in {elapsed:.2f}s")
+    return model, info
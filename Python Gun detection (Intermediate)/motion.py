@@ -0,0 +1,76 @@
+"""Motion-gated inference scheduling.
+
+A fixed ``process_every_n_frames`` runs YOLO as often on an empty corridor as
+on a busy entrance. MotionGate looks at a tiny grayscale copy of every frame
+(a few hundred microseconds) and decides whether the model needs to run:
+
+- motion in the scene, or a running detection streak -> run every
+  ``active_every`` frames
+- static scene -> only a heartbeat pass every ``idle_every`` frames, so an
+  object that was already lying still in view is still picked up
+"""
+import cv2
+
+
+class MotionGate:
+    def __init__(self, active_every=1, idle_every=30, size=(160, 120),
+                 pixel_threshold=25, motion_fraction=0.005, learning_rate=0.05,
+                 hold_frames=15):
+        self.active_every = active_every
+        self.idle_every = idle_every
+        self.size = size                      # (width, height) of the motion image
+        self.pixel_threshold = pixel_threshold  # grey-level change that counts as motion
+        self.motion_fraction = motion_fraction  # share of changed pixels that counts as motion
+        self.learning_rate = learning_rate    # how fast the background adapts
+        self.hold_frames = hold_frames        # keep the active rate this long after motion stops
+
+        self.background = None
+        self.frames_since_inference = 0
+        self.frames_since_motion = hold_frames
+        self.motion_score = 0.0
+
+        # Counters for tuning
+        self.frames_seen = 0
+        self.frames_inferred = 0
+
+    def measure(self, frame):
+        """Update the background model and return the changed-pixel fraction"""
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        gray = cv2.GaussianBlur(gray, (5, 5), 0)
+
+        if self.background is None:
+            self.background = gray.astype("float32")
+            return 1.0  # treat the first frame as motion so it gets inferred
+
+        diff = cv2.absdiff(gray, cv2.convertScaleAbs(self.background))
+        cv2.accumulateWeighted(gray, self.background, self.learning_rate)
+        _, changed = cv2.threshold(diff, self.pixel_threshold, 255, cv2.THRESH_BINARY)
+        return cv2.countNonZero(changed) / changed.size
+
+    def should_infer(self, frame, detection_streak=0):
+        """Return True when detect_weapons should run on this frame"""
+        self.frames_seen += 1
+        self.frames_since_inference += 1
+
+        self.motion_score = self.measure(frame)
+        moving = self.motion_score >= self.motion_fraction
+        if moving:
+            # Motion just appeared: don't wait for the next scheduled slot
+            if self.frames_since_motion >= self.hold_frames:
+                self.frames_since_inference = self.active_every
+            self.frames_since_motion = 0
+        else:
+            self.frames_since_motion += 1
+
+        active = detection_streak > 0 or self.frames_since_motion < self.hold_frames
+        interval = self.active_every if active else self.idle_every
+        if self.frames_since_inference >= interval:
+            self.frames_since_inference = 0
+            self.frames_inferred += 1
+            return True
+        return False
+
+    def inference_ratio(self):
+        """Share of frames that were sent to the model"""
+        return self.frames_inferred / self.frames_seen if self.frames_seen else 0.0
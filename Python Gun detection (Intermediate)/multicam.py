@@ -0,0 +1,202 @@
+"""Serve several cameras from one detector process and one model.
+
+Each camera gets a capture thread that keeps only its newest frame. The
+main loop collects the newest frame of every camera that is due for inference
+(per-camera ``process_every_n_frames``), sends them through the model in a
+single batched call, and routes the boxes back to their camera, applying that
+camera's own confidence threshold. Memory grows with the number of frame
+buffers, not with the number of models.
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from metrics import BATCH_BUCKETS
+from pipeline import LatestQueue
+from sources import open_source
+
+
+def open_camera_source(spec):
+    """Webcam index ("0", "1", ...) or anything sources.open_source accepts"""
+    if spec.isdigit():
+        capture = cv2.VideoCapture(int(spec))
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return capture
+    return open_source(spec)
+
+
+def parse_camera_spec(spec):
+    """Parse NAME=SOURCE[,conf=0.3][,every=2] from the command line"""
+    name, _, rest = spec.partition("=")
+    if not rest:
+        rest = name
+        name = rest.split(",")[0]
+        name = f"camera{name}" if name.isdigit() else name
+    parts = rest.split(",")
+    options = dict(part.split("=", 1) for part in parts[1:])
+    return {
+        'name': name,
+        'source': parts[0],
+        'conf': float(options.get('conf', 0.2)),
+        'every': int(options.get('every', 2)),
+    }
+
+
+class CameraStream:
+    """One camera: capture thread, newest-frame slot and per-camera state"""
+
+    def __init__(self, name, source, conf=0.2, process_every_n_frames=2, frame_ready=None):
+        self.name = name
+        self.source = source
+        self.conf = conf
+        self.process_every_n_frames = process_every_n_frames
+        self.frames = LatestQueue(1)
+        self.frame_ready = frame_ready
+        self.stopped = False
+
+        # Per-camera detection and alarm state
+        self.frame_count = 0
+        self.detections = []
+        self.detection_streak = 0
+        self.alarm_active = False
+        self.alarm_cooldown = 0
+
+        # Displayed frames per second, updated every few frames
+        self.fps = 0.0
+        self.fps_start_time = time.time()
+        self.fps_frame_count = 0
+
+        self.thread = threading.Thread(target=self.capture_loop, name=f"capture-{name}", daemon=True)
+
+    def start(self):
+        if not self.source.isOpened():
+            raise Exception(f"Could not open camera {self.name}")
+        self.thread.start()
+
+    def capture_loop(self):
+        while not self.stopped:
+            ret, frame = self.source.read()
+            if not ret:
+                print(f"[{self.name}] Failed to grab frame")
+                break
+            self.frames.put(frame)
+            if self.frame_ready is not None:
+                self.frame_ready.set()
+        self.stopped = True
+        if self.frame_ready is not None:
+            self.frame_ready.set()
+
+    def latest(self):
+        """Newest frame not handed out yet, or None"""
+        return self.frames.get(timeout=0)
+
+    def stop(self):
+        self.stopped = True
+        self.thread.join(timeout=2.0)
+        self.source.release()
+
+
+class MultiCameraDetector:
+    def __init__(self, detector, cameras, headless=False):
+        self.detector = detector
+        self.cameras = cameras
+        self.headless = headless
+        self.frame_ready = threading.Event()
+        for camera in cameras:
+            camera.frame_ready = self.frame_ready
+        self.batches = 0
+        self.batched_frames = 0
+        self.check_model()
+
+    def check_model(self):
+        self.detector.require_pytorch_model("Batched multi-camera inference")
+
+    def infer(self, due):
+        """Run one batched model call for [(camera, frame), ...]"""
+        if not due:
+            return
+        detector = self.detector
+        preprocessed = [detector.preprocess(frame, slot=i) for i, (_, frame) in enumerate(due)]
+
+        # The model keeps everything above the lowest camera threshold,
+        # each camera then applies its own; the user's setting ('s' key) comes back after
+        conf = detector.model.conf
+        detector.model.conf = min(camera.conf for camera, _ in due)
+        try:
+            results = detector.detect_weapons_batch(preprocessed)
+        except Exception as e:
+            print(f"Error during batched detection: {e}")
+            results = [np.empty((0, 6), dtype=np.float32)] * len(due)
+        finally:
+            detector.model.conf = conf
+
+        if detector.metrics is not None:
+            detector.metrics.observe("inference_batch_size", len(due), buckets=BATCH_BUCKETS)
+        self.batches += 1
+        self.batched_frames += len(due)
+
+        for (camera, frame), boxes in zip(due, results):
+            boxes = detector.scale_boxes(boxes[boxes[:, 4] >= camera.conf], frame.shape)
+            camera.detections = detector.boxes_to_detections(boxes)
+            camera.detection_streak = camera.detection_streak + 1 if len(boxes) else 0
+            detector.publish_detections(camera.detections, camera=camera.name)
+
+    def render(self, camera, frame):
+        detector = self.detector
+        detector.handle_alarm(camera.detections, camera.detection_streak, frame,
+                              state=camera, camera=camera.name)
+        camera.fps_frame_count += 1
+        if camera.fps_frame_count >= 5:
+            current_time = time.time()
+            camera.fps = camera.fps_frame_count / (current_time - camera.fps_start_time)
+            camera.fps_start_time = current_time
+            camera.fps_frame_count = 0
+        if self.headless:
+            return
+        # Inference is done with this frame, draw straight onto it
+        detector.draw_detections(frame, camera.detections)
+        detector.draw_status(frame, camera.detections, camera.fps)
+        detector.show(f"Weapon Detection - {camera.name}", frame)
+
+    def run(self):
+        detector = self.detector
+        detector.configure_opencv()
+        for camera in self.cameras:
+            camera.start()
+        print(f"Serving {len(self.cameras)} camera(s) with one model")
+
+        last_report = time.time()
+        try:
+            while not all(camera.stopped for camera in self.cameras):
+                self.frame_ready.wait(timeout=0.5)
+                self.frame_ready.clear()
+
+                fresh, due = [], []
+                for camera in self.cameras:
+                    frame = camera.latest()
+                    if frame is None:
+                        continue
+                    camera.frame_count += 1
+                    fresh.append((camera, frame))
+                    if camera.frame_count % camera.process_every_n_frames == 0:
+                        due.append((camera, frame))
+
+                self.infer(due)
+                for camera, frame in fresh:
+                    self.render(camera, frame)
+
+                if not self.headless and fresh:
+                    if not detector.handle_key(cv2.waitKey(1) & 0xFF):
+                        break
+
+                if time.time() - last_report >= 10.0 and self.batches:
+                    print(f"[multicam] batches={self.batches} "
+                          f"avg batch={self.batched_frames / self.batches:.2f} | " +
+                          " ".join(f"{c.name}:{c.frame_count}f" for c in self.cameras))
+                    last_report = time.time()
+        finally:
+            for camera in self.cameras:
+                camera.stop()
+            detector.cleanup()
@@ -0,0 +1,251 @@
+"""Threaded capture -> inference -> render pipeline for WeaponDetectionSystem.
+
+The single-threaded loop in ``WeaponDetectionSystem.run`` waits for every
+YOLO pass before it can show the next frame. Here each stage runs on its own
+and the stages only hand each other the newest frame, so a slow model never
+holds back the display and old camera frames never pile up.
+"""
+import threading
+import time
+from collections import deque
+
+import cv2
+
+
+class LatestQueue:
+    """Small bounded queue that keeps the newest items.
+
+    When the queue is full the oldest item is thrown away and counted in
+    ``dropped`` instead of blocking the producer.
+    """
+
+    def __init__(self, maxsize=1):
+        self.maxsize = max(1, maxsize)
+        self.items = deque()
+        self.condition = threading.Condition()
+        self.put_count = 0
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.put_count += 1
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None on timeout/close"""
+        with self.condition:
+            if not self.items and not self.closed:
+                self.condition.wait(timeout)
+            if not self.items:
+                return None
+            return self.items.popleft()
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def depth(self):
+        with self.condition:
+            return len(self.items)
+
+
+class DetectionPipeline:
+    """Run a WeaponDetectionSystem as capture, inference and render stages.
+
+    capture thread   -> reads the camera and pushes frames to both queues
+    inference thread -> preprocesses the newest frame and runs detect_weapons
+    render loop      -> draws the latest detections on the newest frame
+
+    The render loop runs on the calling thread because OpenCV's HighGUI
+    (cv2.imshow / cv2.waitKey) has to stay on the main thread on most systems.
+    """
+
+    def __init__(self, detector, queue_size=1, stats_interval=5.0):
+        self.detector = detector
+        self.inference_queue = LatestQueue(queue_size)
+        self.render_queue = LatestQueue(queue_size)
+        self.stats_interval = stats_interval
+        self.stop_event = threading.Event()
+
+        # Latest inference result, written by the worker and read by render
+        self.result_lock = threading.Lock()
+        self.detections = []
+        self.detection_streak = 0
+        self.result_frame_id = 0
+
+        # Stage counters
+        self.frames_captured = 0
+        self.frames_inferred = 0
+        self.frames_rendered = 0
+        self.frames_gated = 0
+        self.inference_time = 0.0
+
+        metrics = detector.metrics
+        if metrics is not None:
+            metrics.register("pipeline_queue_depth", self.inference_queue.depth, queue="inference")
+            metrics.register("pipeline_queue_depth", self.render_queue.depth, queue="render")
+            metrics.register("pipeline_dropped_frames_total", lambda: self.inference_queue.dropped,
+                             kind="counter", queue="inference")
+            metrics.register("pipeline_dropped_frames_total", lambda: self.render_queue.dropped,
+                             kind="counter", queue="render")
+
+    def capture_loop(self):
+        camera = self.detector.camera
+        frame_id = 0
+        while not self.stop_event.is_set():
+            ret, frame = camera.read()
+            if not ret:
+                print("Failed to grab frame")
+                break
+            frame_id += 1
+            self.frames_captured = frame_id
+            timestamp = time.time()
+            if self.detector.evidence is not None:
+                self.detector.evidence.record(frame, timestamp)
+            self.inference_queue.put((frame_id, timestamp, frame))
+            self.render_queue.put((frame_id, timestamp, frame))
+        self.stop()
+
+    def inference_loop(self):
+        while not self.stop_event.is_set():
+            item = self.inference_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            frame_id, timestamp, frame = item
+            try:
+                # Let the motion gate skip static scenes
+                gate = self.detector.motion_gate
+                if gate is not None and not gate.should_infer(frame, self.detection_streak):
+                    self.frames_gated += 1
+                    if self.detector.metrics is not None:
+                        self.detector.metrics.inc("frames_skipped_total")
+                    continue
+
+                start = time.perf_counter()
+                boxes = self.detector.detect_frame(frame)
+                self.inference_time = time.perf_counter() - start
+            except Exception as e:
+                print(f"Error in inference worker: {e}")
+                continue
+
+            tracker = self.detector.tracker
+            with self.result_lock:
+                if tracker is not None:
+                    tracker.update(boxes, timestamp)
+                    self.detection_streak = tracker.max_streak()
+                else:
+                    self.detections = self.detector.boxes_to_detections(boxes)
+                    self.detection_streak = self.detection_streak + 1 if len(boxes) else 0
+                self.result_frame_id = frame_id
+                detections = (self.detector.tracks_to_detections(tracker.predict(timestamp, matched_only=True))
+                              if tracker is not None else self.detections)
+                self.detector.publish_detections(detections, timestamp)
+            self.frames_inferred += 1
+
+    def stats(self):
+        """Snapshot of queue depths, drop counts and stage throughput"""
+        return {
+            'captured': self.frames_captured,
+            'inferred': self.frames_inferred,
+            'rendered': self.frames_rendered,
+            'gated': self.frames_gated,
+            'inference_queue_depth': self.inference_queue.depth(),
+            'inference_dropped': self.inference_queue.dropped,
+            'render_queue_depth': self.render_queue.depth(),
+            'render_dropped': self.render_queue.dropped,
+            'inference_ms': self.inference_time * 1000,
+        }
+
+    def print_stats(self):
+        s = self.stats()
+        print(f"[pipeline] captured={s['captured']} inferred={s['inferred']} "
+              f"rendered={s['rendered']} gated={s['gated']} | infer q={s['inference_queue_depth']} "
+              f"dropped={s['inference_dropped']} | render q={s['render_queue_depth']} "
+              f"dropped={s['render_dropped']} | infer {s['inference_ms']:.1f} ms")
+
+    def draw_pipeline_stats(self, display_frame):
+        s = self.stats()
+        text = (f"Queues infer:{s['inference_queue_depth']} drop:{s['inference_dropped']}  "
+                f"render:{s['render_queue_depth']} drop:{s['render_dropped']}")
+        cv2.putText(display_frame, text, (10, 120),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
+
+    def render_loop(self):
+        detector = self.detector
+        fps_start_time = time.time()
+        fps_frame_count = 0
+        fps = 0
+        last_stats_time = time.time()
+
+        while not self.stop_event.is_set():
+            item = self.render_queue.get(timeout=0.5)
+            if item is None:
+                continue
+            _, timestamp, frame = item
+            try:
+                # The inference worker may still be reading this frame, draw on a copy
+                display_frame = frame.copy()
+                with self.result_lock:
+                    if detector.tracker is not None:
+                        # Predict tracked boxes to the time this frame was captured,
+                        # coasting tracks are drawn but don't keep the alarm on
+                        detected_weapons = detector.tracks_to_detections(detector.tracker.predict(timestamp))
+                        alarm_weapons = detector.tracks_to_detections(
+                            detector.tracker.predict(timestamp, matched_only=True))
+                    else:
+                        detected_weapons = alarm_weapons = self.detections
+                    detection_streak = self.detection_streak
+
+                # Detections are already in display frame coordinates
+                detector.handle_alarm(alarm_weapons, detection_streak, display_frame)
+                detector.draw_detections(display_frame, detected_weapons)
+
+                # Calculate FPS of the display stage
+                fps_frame_count += 1
+                if fps_frame_count >= 5:
+                    current_time = time.time()
+                    fps = fps_frame_count / (current_time - fps_start_time)
+                    fps_start_time = current_time
+                    fps_frame_count = 0
+
+                detector.draw_status(display_frame, detected_weapons, fps)
+                self.draw_pipeline_stats(display_frame)
+                self.frames_rendered += 1
+                detector.timer.frame_done()
+
+                detector.show("Enhanced Weapon Detection System", display_frame)
+                if not detector.handle_key(cv2.waitKey(1) & 0xFF):
+                    break
+
+                if self.stats_interval and time.time() - last_stats_time >= self.stats_interval:
+                    self.print_stats()
+                    last_stats_time = time.time()
+            except Exception as e:
+                print(f"Error in render loop: {e}")
+                continue
+
+    def stop(self):
+        self.stop_event.set()
+        self.inference_queue.close()
+        self.render_queue.close()
+
+    def run(self):
+        threads = [
+            threading.Thread(target=self.capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self.inference_loop, name="inference", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            self.render_loop()
+        finally:
+            self.stop()
+            for thread in threads:
+                thread.join(timeout=2.0)
+            self.print_stats()
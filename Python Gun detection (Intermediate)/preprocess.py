@@ -0,0 +1,50 @@
+"""Allocation-free frame preprocessing.
+
+The plain path allocated a resized frame, a ``convertScaleAbs`` output and an
+RGB copy for every processed frame. ``FramePreprocessor`` keeps one buffer
+per (stage, slot) and writes into it with OpenCV's ``dst=`` arguments, and
+replaces the contrast step with a 256-entry lookup table. Slots let callers
+that need several live buffers at once (batched multi-camera inference,
+tiles) keep them apart; buffers are reallocated only when the shape changes.
+
+A buffer is overwritten by the next call with the same slot, so results have
+to be consumed (or copied) before that. The YOLOv5 model copies its input
+while letterboxing, so passing a buffer to the model is safe.
+"""
+import cv2
+import numpy as np
+
+
+def contrast_lut(alpha=1.1, beta=5):
+    """Lookup table equal to cv2.convertScaleAbs(x, alpha=alpha, beta=beta)"""
+    # Built by OpenCV itself so rounding matches the per-pixel call exactly
+    return cv2.convertScaleAbs(np.arange(256, dtype=np.uint8), alpha=alpha, beta=beta).ravel()
+
+
+class FramePreprocessor:
+    def __init__(self, size, alpha=1.1, beta=5):
+        self.size = size  # (width, height)
+        self.lut = contrast_lut(alpha, beta)
+        self.buffers = {}
+        self.allocations = 0
+
+    def buffer(self, key, shape):
+        buf = self.buffers.get(key)
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, dtype=np.uint8)
+            self.buffers[key] = buf
+            self.allocations += 1
+        return buf
+
+    def resize(self, frame, slot=0):
+        width, height = self.size
+        dst = self.buffer(('resized', slot), (height, width) + frame.shape[2:])
+        return cv2.resize(frame, self.size, dst=dst)
+
+    def contrast(self, frame, slot=0, in_place=False):
+        dst = frame if in_place else self.buffer(('contrast', slot), frame.shape)
+        return cv2.LUT(frame, self.lut, dst=dst)
+
+    def to_rgb(self, frame, slot=0):
+        dst = self.buffer(('rgb', slot), frame.shape)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=dst)
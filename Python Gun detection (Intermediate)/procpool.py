@@ -0,0 +1,200 @@
+"""Fan inference out over worker processes, frames in shared memory.
+
+One Python process is limited by the GIL and one model's throughput. Here
+each worker process holds its own detector and a ring of frame slots in a
+``multiprocessing.shared_memory`` block. The parent copies a camera frame
+straight into a free slot and sends only a tiny task tuple (slot, shape,
+camera, frame id) through a queue; the worker runs ``detect_frame`` on a
+NumPy view of the slot and sends back the slot number plus the small box
+array. Frames are never pickled.
+
+Workers are started with the ``spawn`` method and build their detector with
+the ``factory`` callable, which must be a module-level function.
+"""
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from multicam import MultiCameraDetector
+
+MAX_FRAME_BYTES = 1920 * 1080 * 3
+
+
+def worker_main(index, shm_name, slots, slot_bytes, tasks, results, factory, threads):
+    import cv2
+    import torch
+
+    cv2.setNumThreads(1)
+    torch.set_num_threads(threads)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    frame = None
+    try:
+        detector = factory()
+        results.put(('ready', index, None, None, None))
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            slot, shape, camera, frame_id = task
+            size = int(np.prod(shape))
+            frame = np.ndarray(shape, dtype=np.uint8, buffer=shm.buf,
+                               offset=slot * slot_bytes) if size <= slot_bytes else None
+            start = time.perf_counter()
+            boxes = detector.detect_frame(frame) if frame is not None else np.empty((0, 6), np.float32)
+            elapsed = time.perf_counter() - start
+            results.put(('result', index, slot, (camera, frame_id, elapsed), boxes))
+    finally:
+        frame = None  # release the view before closing the block
+        shm.close()
+
+
+class DetectorPool:
+    """Pool of detector processes fed through shared-memory frame rings"""
+
+    def __init__(self, factory, workers=2, slots_per_worker=2, max_frame_bytes=MAX_FRAME_BYTES,
+                 threads_per_worker=1):
+        context = mp.get_context("spawn")
+        self.slot_bytes = max_frame_bytes
+        self.results = context.Queue()
+        self.workers = []
+        self.dropped = 0
+        self.submitted = 0
+        for index in range(workers):
+            shm = shared_memory.SharedMemory(create=True, size=slots_per_worker * max_frame_bytes)
+            tasks = context.Queue()
+            process = context.Process(
+                target=worker_main, name=f"detector-{index}", daemon=True,
+                args=(index, shm.name, slots_per_worker, max_frame_bytes, tasks,
+                      self.results, factory, threads_per_worker))
+            process.start()
+            self.workers.append({
+                'process': process,
+                'shm': shm,
+                'tasks': tasks,
+                'free': list(range(slots_per_worker)),
+                'ready': False,
+            })
+
+    def wait_ready(self, timeout=300.0):
+        """Block until every worker has loaded its model, fail fast if one dies"""
+        deadline = time.time() + timeout
+        while not all(worker['ready'] for worker in self.workers):
+            for index, worker in enumerate(self.workers):
+                if not worker['ready'] and not worker['process'].is_alive():
+                    raise RuntimeError(f"Detector worker {index} exited with code "
+                                       f"{worker['process'].exitcode} while loading its model")
+            if time.time() > deadline:
+                raise TimeoutError(f"Detector workers not ready after {timeout:.0f}s")
+            try:
+                kind, index, *_ = self.results.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            if kind == 'ready':
+                self.workers[index]['ready'] = True
+        print(f"Detector pool ready: {len(self.workers)} worker process(es)")
+
+    def check_workers(self):
+        """Retire workers that died: their in-flight slots are lost, stop feeding them"""
+        for index, worker in enumerate(self.workers):
+            if worker['ready'] and not worker['process'].is_alive():
+                worker['ready'] = False
+                worker['free'] = []
+                print(f"⚠️ Detector worker {index} exited with code {worker['process'].exitcode}")
+        if not any(worker['ready'] for worker in self.workers):
+            raise RuntimeError("All detector workers have exited")
+
+    def submit(self, frame, camera, frame_id):
+        """Copy frame into a free slot of the least busy worker, False if all are busy"""
+        if frame.nbytes > self.slot_bytes:
+            raise ValueError(f"Frame of {frame.nbytes} bytes exceeds the pool slot size")
+        candidates = [w for w in self.workers if w['free'] and w['ready']]
+        if not candidates:
+            self.dropped += 1
+            return False
+        worker = max(candidates, key=lambda w: len(w['free']))
+        slot = worker['free'].pop()
+        view = np.ndarray(frame.shape, dtype=np.uint8, buffer=worker['shm'].buf,
+                          offset=slot * self.slot_bytes)
+        np.copyto(view, frame)
+        worker['tasks'].put((slot, frame.shape, camera, frame_id))
+        self.submitted += 1
+        return True
+
+    def poll(self):
+        """Collect finished results as [(camera, frame_id, boxes, seconds), ...]"""
+        self.check_workers()
+        finished = []
+        while True:
+            try:
+                kind, index, slot, meta, boxes = self.results.get_nowait()
+            except queue.Empty:
+                return finished
+            if kind == 'ready':
+                self.workers[index]['ready'] = True
+                continue
+            if self.workers[index]['ready']:
+                self.workers[index]['free'].append(slot)
+            camera, frame_id, elapsed = meta
+            finished.append((camera, frame_id, boxes, elapsed))
+
+    def close(self):
+        for worker in self.workers:
+            worker['tasks'].put(None)
+        for worker in self.workers:
+            worker['process'].join(timeout=5.0)
+            if worker['process'].is_alive():
+                worker['process'].terminate()
+            worker['shm'].close()
+            worker['shm'].unlink()
+
+
+class PooledMultiCameraDetector(MultiCameraDetector):
+    """MultiCameraDetector that sends due frames to a DetectorPool.
+
+    Inference is asynchronous: frames are submitted as they become due and
+    each camera's detections are updated when its result comes back. Workers
+    can finish out of order, so a result older than the one a camera already
+    shows is dropped.
+    """
+
+    def __init__(self, detector, cameras, pool, headless=False):
+        super().__init__(detector, cameras, headless=headless)
+        self.pool = pool
+        self.by_name = {camera.name: camera for camera in cameras}
+        self.applied = {}  # camera name -> frame_id of the result it shows
+        self.stale = 0     # results dropped because a newer one was already applied
+
+    def check_model(self):
+        pass  # workers run single frames, the TorchScript export is fine for them
+
+    def infer(self, due):
+        detector = self.detector
+        for camera, frame in due:
+            self.pool.submit(frame, camera.name, camera.frame_count)
+
+        for name, frame_id, boxes, elapsed in self.pool.poll():
+            if detector.metrics is not None:
+                detector.metrics.observe("pool_inference_seconds", elapsed)
+            if frame_id <= self.applied.get(name, -1):
+                self.stale += 1
+                continue
+            self.applied[name] = frame_id
+            camera = self.by_name[name]
+            boxes = boxes[boxes[:, 4] >= camera.conf]
+            camera.detections = detector.boxes_to_detections(boxes)
+            camera.detection_streak = camera.detection_streak + 1 if len(boxes) else 0
+            self.batches += 1
+            self.batched_frames += 1
+            detector.publish_detections(camera.detections, camera=camera.name)
+
+    def run(self):
+        self.pool.wait_ready()
+        try:
+            super().run()
+        finally:
+            print(f"[pool] submitted={self.pool.submitted} dropped={self.pool.dropped} "
+                  f"stale={self.stale}")
+            self.pool.close()
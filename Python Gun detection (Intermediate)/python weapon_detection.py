@@ -8,12 +8,40 @@ import pygame
 from pathlib import Path
 import torch
 import gc
+import argparse
 
+from pipeline import DetectionPipeline
+from sources import open_source
+from model_loader import load_model, model_input_shape
+from motion import MotionGate
+from tracker import WeaponTracker
+from evidence import EvidenceWriter, FrameRing
+from tiling import TiledDetector, parse_roi
+from preprocess import FramePreprocessor
+from metrics import Metrics, BATCH_BUCKETS
+from events import EventStream, open_sink
+from event_store import EventStore
+import cpu_tuning
+from multicam import CameraStream, MultiCameraDetector, open_camera_source, parse_camera_spec
+from procpool import DetectorPool, PooledMultiCameraDetector
+from functools import partial
+from benchmark import StageTimer, NullTimer, write_report, print_summary
 
-pygame.mixer.init()
+
+try:
+    pygame.mixer.init()
+except pygame.error as e:
+    # Servers without a sound device can still run headless
+    print(f"⚠️ Audio not available, alarm sound disabled: {e}")
 
 class WeaponDetectionSystem:
-    def __init__(self):
+    def __init__(self, source=None, alarm=True, weights="yolov5n.pt", export_model=True,
+                 open_camera=True):
+        """source: a sources.py frame source, or None for the default webcam.
+        open_camera: False leaves self.camera unset (multi-camera mode opens its own).
+        alarm: set False to keep the siren silent (benchmarks, replays).
+        weights/export_model: local weights file and whether to cache a
+        TorchScript export of it (see model_loader.py)."""
         # Create directory for storing detected weapon images if it doesn't exist
         self.save_dir = Path("detected_weapons")
         self.save_dir.mkdir(exist_ok=True)
@@ -28,9 +56,14 @@ class WeaponDetectionSystem:
         else:
             print("⚠️ GPU not available, using CPU")
         
-        # Load YOLOv5 model - use a slightly larger model for better detection
-        print("🔄 Loading YOLOv5s model for better detection accuracy...")
-        self.model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True, force_reload=True)
+        self.inference_size = (416, 312)  # (width, height) fed to the model
+        self.model_size = model_input_shape(self.inference_size)  # (height, width) after letterboxing
+        self.preprocessor = FramePreprocessor(self.inference_size)  # reused frame buffers
+        
+        # Load YOLOv5 from local weights, using the cached compiled artifact when present
+        print(f"🔄 Loading {weights}...")
+        self.model, self.model_info = load_model(weights, inference_size=self.inference_size,
+                                                 device=self.device, export=export_model)
         
         # Force model to use CUDA if available
         self.model.to(self.device)
@@ -52,26 +85,71 @@ class WeaponDetectionSystem:
         # Class IDs in COCO dataset that might represent weapons
         # 43: knife, 76: scissors, 44: spoon, 46: wine glass, 41: cup
         self.weapon_class_ids = [43, 76, 44, 46, 41]
+        self.build_weapon_mask()
         
         # Load alarm sound
-        self.alarm_sound = pygame.mixer.Sound("alarm.wav")
+        self.alarm_sound = None
+        if alarm and pygame.mixer.get_init():
+            self.alarm_sound = pygame.mixer.Sound("alarm.wav")
         
-        # Initialize camera
-        self.camera = cv2.VideoCapture(0)
-        if not self.camera.isOpened():
-            raise Exception("Could not open video device")
-        
-        # Set camera properties
-        self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1080)
-        self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-        self.camera.set(cv2.CAP_PROP_FPS, 30)
-        self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if not open_camera:
+            self.camera = None
+        elif source is None:
+            # Initialize camera
+            self.camera = cv2.VideoCapture(0)
+            if not self.camera.isOpened():
+                raise Exception("Could not open video device")
+            
+            # Set camera properties
+            self.camera.set(cv2.CAP_PROP_FRAME_WIDTH, 1080)
+            self.camera.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            self.camera.set(cv2.CAP_PROP_FPS, 30)
+            self.camera.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        else:
+            # Replay from a file, image folder or synthetic generator
+            self.camera = source
+            if not self.camera.isOpened():
+                raise Exception("Could not open frame source")
         
         # Frame processing settings - process every other frame for better performance/detection balance
         self.process_every_n_frames = 2 # Process every 2nd frame instead of every 3rd
         self.frame_count = 0
+        self.num_threads = 4  # OpenCV (and with --cpu-optimize, torch) thread budget
         self.last_result = []  # Cache last detection result
         
+        # Optional MotionGate that replaces the fixed every-n-frames schedule
+        self.motion_gate = None
+        
+        # Optional WeaponTracker that carries boxes between inference frames
+        self.tracker = None
+        
+        # Optional EvidenceWriter that saves snapshots and clips off the main loop
+        self.evidence = None
+        
+        # Optional TiledDetector for native-resolution tile / ROI inference
+        self.tiler = None
+        
+        # Alarm state shared by the single-threaded loop and the pipeline
+        self.alarm_active = False
+        self.alarm_cooldown = 0
+        self.active_alarm_count = 0  # alarms currently sounding, over all cameras
+        
+        # Stage timer, replaced by a StageTimer when benchmarking
+        self.timer = NullTimer()
+        
+        # Optional Metrics collector, see install_metrics()
+        self.metrics = None
+        
+        # Optional EventStream that publishes every detection as a JSON event
+        self.events = None
+        
+        # Optional EventStore that keeps every detection in an indexed SQLite file
+        self.event_store = None
+        self.camera_name = "camera0"
+        
+        # Set once a window is shown; headless OpenCV builds can't destroy windows
+        self.windows_open = False
+        
         print(f"Enhanced Weapon Detection System initialized successfully!")
 
     def is_weapon(self, class_name, class_id):
@@ -92,51 +170,282 @@ class WeaponDetectionSystem:
             
         return False
 
+    def build_weapon_mask(self):
+        """Precompute a per-class-id weapon mask from the model's class names.
+
+        is_weapon() is evaluated once per class here instead of once per box
+        every frame, so filtering a frame becomes a single indexing operation.
+        """
+        names = self.model.names
+        if isinstance(names, dict):
+            self.class_names = [names[i] for i in range(len(names))]
+        else:
+            self.class_names = list(names)
+        mask = np.array([self.is_weapon(name, class_id)
+                         for class_id, name in enumerate(self.class_names)], dtype=bool)
+        self.weapon_mask = mask
+        self.weapon_mask_tensor = torch.from_numpy(mask).to(self.device)
+
     @torch.no_grad()  # Disable gradient calculation for faster inference
-    def detect_weapons(self, frame):
-        try:
+    def detect_weapons_array(self, frame):
+        """Fast path: return weapon boxes as one float32 array.
+
+        Each row is (x1, y1, x2, y2, confidence, class_id) in the coordinates
+        of ``frame``. Boxes are filtered on the raw prediction tensor with the
+        precomputed weapon mask, no pandas or per-box Python work involved.
+        """
+        with self.timer.stage('inference'):
             # Convert OpenCV BGR to RGB format for the model
-            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-            
+            rgb_frame = self.preprocessor.to_rgb(frame)
+
             # Run inference with half precision for faster GPU processing
             with torch.cuda.amp.autocast(enabled=self.device=='cuda'):
-                results = self.model(rgb_frame, size=416)  # Increased inference size for better detection
-            
-            # Extract predictions
-            predictions = results.pandas().xyxy[0]
-            
-            detected_weapons = []
-            
-            # Process the results
-            for _, prediction in predictions.iterrows():
-                # Extract class and confidence
-                class_id = int(prediction['class'])
-                class_name = prediction['name']
-                confidence = float(prediction['confidence'])
-                
-                # Skip if not a potential weapon
-                if not self.is_weapon(class_name, class_id):
-                    continue
-                
-                # Extract bounding box coordinates
-                x1, y1 = int(prediction['xmin']), int(prediction['ymin'])
-                x2, y2 = int(prediction['xmax']), int(prediction['ymax'])
-                
-                detected_weapons.append({
-                    'class': class_name,
-                    'confidence': confidence,
-                    'box': (x1, y1, x2, y2)
-                })
-            
-            return detected_weapons
+                # The exact shape a TorchScript export was traced at; same letterbox for .pt weights
+                results = self.model(rgb_frame, size=self.model_size)
+
+        with self.timer.stage('postprocess'):
+            return self.filter_weapon_boxes(results.xyxy[0])
+
+    @torch.no_grad()
+    def detect_weapons_batch(self, frames, size=None):
+        """Batched fast path: one model call for several preprocessed frames.
+
+        Returns one (N, 6) weapon box array per frame, like detect_weapons_array.
+        Needs the plain weights (see require_pytorch_model).
+        """
+        with self.timer.stage('inference'):
+            rgb_frames = [self.preprocessor.to_rgb(frame, slot=i) for i, frame in enumerate(frames)]
+            with torch.cuda.amp.autocast(enabled=self.device=='cuda'):
+                results = self.model(rgb_frames, size=size or self.model_size)
+
+        with self.timer.stage('postprocess'):
+            return [self.filter_weapon_boxes(predictions) for predictions in results.xyxy]
+
+    def require_pytorch_model(self, mode):
+        """Fail early when a mode can't run on the single-frame TorchScript export"""
+        if self.model_info['source'] != "weights":
+            raise ValueError(f"{mode} needs the plain PyTorch weights, the TorchScript export "
+                             f"only takes one {self.inference_size[0]}x{self.inference_size[1]} frame")
+
+    def filter_weapon_boxes(self, predictions):
+        """Keep only weapon rows of an (N, 6) xyxy/conf/class prediction tensor"""
+        if predictions.shape[0] == 0:
+            return np.empty((0, 6), dtype=np.float32)
+        class_ids = predictions[:, 5].long().clamp_(0, len(self.weapon_mask) - 1)
+        keep = self.weapon_mask_tensor[class_ids]
+        return predictions[keep].float().cpu().numpy()
+
+    def boxes_to_detections(self, boxes):
+        """Convert a detect_weapons_array() result into the list-of-dicts form"""
+        return [{
+            'class': self.class_names[int(class_id)],
+            'confidence': float(confidence),
+            'box': (int(x1), int(y1), int(x2), int(y2))
+        } for x1, y1, x2, y2, confidence, class_id in boxes.tolist()]
+
+    def detect_weapons(self, frame):
+        try:
+            return self.boxes_to_detections(self.detect_weapons_array(frame))
         except Exception as e:
             print(f"Error during detection: {e}")
             return []
 
-    def run(self):
-        alarm_active = False
-        alarm_cooldown = 0
-        
+    def scale_boxes(self, boxes, display_shape):
+        """Map boxes from inference size onto a display frame of display_shape"""
+        boxes = boxes.copy()
+        boxes[:, [0, 2]] *= display_shape[1] / self.inference_size[0]
+        boxes[:, [1, 3]] *= display_shape[0] / self.inference_size[1]
+        return boxes
+
+    def detect_weapon_boxes(self, frame, display_shape):
+        """Run detect_weapons_array on a preprocessed frame, boxes in display coordinates"""
+        try:
+            return self.scale_boxes(self.detect_weapons_array(frame), display_shape)
+        except Exception as e:
+            print(f"Error during detection: {e}")
+            return np.empty((0, 6), dtype=np.float32)
+
+    def install_metrics(self, metrics):
+        """Record stage timings and loop counters into a metrics.Metrics"""
+        self.metrics = metrics
+        self.timer = metrics
+        if self.motion_gate is not None:
+            metrics.register("motion_inference_ratio", self.motion_gate.inference_ratio)
+        if self.evidence is not None:
+            metrics.register("evidence_dropped_jobs_total", lambda: self.evidence.dropped_jobs, kind="counter")
+            metrics.register("evidence_queue_depth", self.evidence.jobs.qsize)
+        if self.events is not None:
+            metrics.register("events_sent_total", lambda: self.events.sent, kind="counter")
+            metrics.register("events_undelivered_total", lambda: self.events.undelivered, kind="counter")
+            metrics.register("events_dropped_total", lambda: self.events.dropped, kind="counter")
+
+    def detect_frame(self, frame):
+        """Run the configured inference mode on a raw camera frame.
+
+        Returns weapon boxes (N, 6) in the coordinates of ``frame``.
+        """
+        if self.metrics is not None:
+            batch_size = (len(self.tiler.crops) or 1) if self.tiler is not None else 1
+            self.metrics.observe("inference_batch_size", batch_size, buckets=BATCH_BUCKETS)
+        if self.tiler is not None:
+            try:
+                return self.tiler.detect(frame)
+            except Exception as e:
+                print(f"Error during tiled detection: {e}")
+                return np.empty((0, 6), dtype=np.float32)
+        return self.detect_weapon_boxes(self.preprocess(frame), frame.shape)
+
+    def tracks_to_detections(self, tracks):
+        """Convert WeaponTracker.predict() output into the list-of-dicts form"""
+        return [{
+            'class': self.class_names[class_id],
+            'confidence': confidence,
+            'box': tuple(int(v) for v in box),
+            'track_id': track_id
+        } for track_id, box, confidence, class_id in tracks]
+
+    def preprocess(self, frame, slot=0):
+        """Resize and contrast-enhance a camera frame for the model.
+
+        Writes into preallocated buffers, so the result is only valid until
+        the next call with the same slot.
+        """
+        with self.timer.stage('resize'):
+            frame = self.preprocessor.resize(frame, slot)
+        # Apply simple contrast enhancement to help with detection (lookup table, in place)
+        with self.timer.stage('contrast'):
+            return self.preprocessor.contrast(frame, slot, in_place=True)
+
+    def publish_detections(self, detections, timestamp=None, camera=None):
+        """Send fresh detections to the event stream and the event store"""
+        if not detections:
+            return
+        timestamp = time.time() if timestamp is None else timestamp
+        camera = self.camera_name if camera is None else camera
+        if self.events is not None:
+            self.events.publish(detections, timestamp, camera=camera)
+        if self.event_store is not None:
+            self.event_store.record(detections, timestamp, camera=camera)
+
+    def handle_alarm(self, detected_weapons, detection_streak, display_frame, state=None,
+                     camera=None):
+        """Start or stop the alarm and save a snapshot when it fires.
+
+        state holds alarm_active/alarm_cooldown, defaults to this object;
+        multi-camera mode passes one state and name per camera.
+        """
+        state = self if state is None else state
+        camera = self.camera_name if camera is None else camera
+        label = f"{camera}_weapon" if camera != "camera0" else "weapon"
+        # If weapons are detected or we have a detection streak, trigger alarm
+        current_time = time.time()
+        if (detected_weapons or detection_streak >= 2) and current_time > state.alarm_cooldown:
+            if not state.alarm_active:
+                if self.metrics is not None:
+                    self.metrics.inc("alarms_total")
+                
+                # Play alarm sound, unless another camera already started it
+                if self.alarm_sound is not None and self.active_alarm_count == 0:
+                    self.alarm_sound.play(-1)
+                self.active_alarm_count += 1
+                state.alarm_active = True
+
+                # Save a snapshot
+                if detected_weapons:
+                    if self.evidence is not None:
+                        # Snapshot and pre/post-event clip are written in the background
+                        full_path = self.evidence.trigger(label)
+                    else:
+                        # Millisecond timestamps so snapshots in the same second don't collide
+                        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")[:-3]
+                        full_path = str(self.save_dir / f"{label}_{timestamp}.jpg")
+                        cv2.imwrite(full_path, display_frame)
+                    if full_path and self.event_store is not None:
+                        self.event_store.attach_snapshot(camera, full_path, current_time)
+
+                # Set alarm cooldown
+                state.alarm_cooldown = current_time + 3  # Reduced cooldown to 3 seconds
+        elif not detected_weapons and detection_streak < 2 and state.alarm_active:
+            # Stop alarm if no weapons are detected on any camera
+            self.active_alarm_count -= 1
+            if self.alarm_sound is not None and self.active_alarm_count == 0:
+                pygame.mixer.stop()
+            state.alarm_active = False
+
+    def draw_detections(self, display_frame, detected_weapons, scale=None):
+        """Draw boxes and labels, optionally scaling from inference size"""
+        for weapon in detected_weapons:
+            x1, y1, x2, y2 = weapon['box']
+
+            # Scale coordinates if frame was resized
+            if scale is not None:
+                scale_x, scale_y = scale
+                x1, x2 = int(x1 * scale_x), int(x2 * scale_x)
+                y1, y2 = int(y1 * scale_y), int(y2 * scale_y)
+
+            weapon_class = weapon['class']
+            confidence = weapon['confidence']
+
+            # Use rectangle with filled red background for better visibility
+            cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+
+            # Enhanced label with confidence
+            label = f"{weapon_class} ({confidence:.2f})"
+            if 'track_id' in weapon:
+                label = f"#{weapon['track_id']} {label}"
+            cv2.putText(display_frame, label, (x1, y1 - 5),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+
+    def draw_status(self, display_frame, detected_weapons, fps):
+        """Draw the alert line, FPS counter and sensitivity mode"""
+        # Add status information
+        if detected_weapons:
+            status_text = f"ALERT! {len(detected_weapons)} weapon(s)"
+            cv2.putText(display_frame, status_text, (10, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+        else:
+            cv2.putText(display_frame, "No weapons detected", (10, 30),
+                       cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+        # Add FPS counter
+        cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 60),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+
+        # Add detection mode info
+        detection_mode = "HIGH SENSITIVITY" if self.model.conf <= 0.2 else "NORMAL"
+        cv2.putText(display_frame, f"Mode: {detection_mode}", (10, 90),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+
+    def handle_key(self, key):
+        """Handle keyboard input, returns False when the user wants to quit"""
+        if key == ord('q'):
+            return False
+        elif key == ord('s'):  # Toggle sensitivity
+            if self.model.conf > 0.15:
+                self.model.conf = 0.15  # Higher sensitivity
+                print("Switched to high sensitivity mode")
+            else:
+                self.model.conf = 0.25  # Normal sensitivity
+                print("Switched to normal sensitivity mode")
+        return True
+
+    def show(self, window, frame):
+        """cv2.imshow that remembers a window was opened, for cleanup()"""
+        cv2.imshow(window, frame)
+        self.windows_open = True
+
+    def configure_opencv(self):
+        # Configure OpenCV for maximum performance
+        cv2.setUseOptimized(True)
+        cv2.setNumThreads(self.num_threads)  # Use multiple threads
+
+    def run(self, headless=False, max_frames=None, draw=True):
+        """Main detection loop.
+
+        headless skips cv2.imshow/waitKey so the loop can run without a
+        display; draw=False also skips all overlay drawing (service mode);
+        max_frames stops it after that many frames.
+        """
         # FPS calculation variables
         fps_start_time = time.time()
         fps_frame_count = 0
@@ -146,16 +455,13 @@ class WeaponDetectionSystem:
         cached_detections = []
         detection_streak = 0  # Count consecutive frames with detections
         
-        # Configure OpenCV for maximum performance
-        cv2.setUseOptimized(True)
-        cv2.setNumThreads(4)  # Use multiple threads
+        self.configure_opencv()
         
-        while True:
+        self.timer.start()
+        while max_frames is None or self.frame_count < max_frames:
             try:
-                # Measure time for FPS calculation
-                frame_start_time = time.time()
-                
-                ret, frame = self.camera.read()
+                with self.timer.stage('read'):
+                    ret, frame = self.camera.read()
                 if not ret:
                     print("Failed to grab frame")
                     break
@@ -163,76 +469,63 @@ class WeaponDetectionSystem:
                 # Count frames
                 self.frame_count += 1
                 
-                # For display purposes
-                display_frame = frame.copy()
+                # Keep the raw frame in the evidence ring buffer
+                if self.evidence is not None:
+                    self.evidence.record(frame)
+                
+                # The raw frame isn't needed once detection has run (and the evidence
+                # ring has its own copy), so overlays are drawn straight onto it
+                display_frame = frame
                 
                 # Process more frames for better detection
-                if self.frame_count % self.process_every_n_frames == 0:
-                    # Resize frame
-                    frame = cv2.resize(frame, (416, 312))  # Slight increase in size
-                    
-                    # Apply simple contrast enhancement to help with detection
-                    frame = cv2.convertScaleAbs(frame, alpha=1.1, beta=5)
-                    
-                    # Detect weapons in the frame
-                    detected_weapons = self.detect_weapons(frame)
-                    
-                    # Update our cache
-                    cached_detections = detected_weapons
+                if self.motion_gate is not None:
+                    with self.timer.stage('motion'):
+                        processed = self.motion_gate.should_infer(frame, detection_streak)
+                else:
+                    processed = self.frame_count % self.process_every_n_frames == 0
+                if processed:
+                    # Detect weapons, boxes come back in display frame coordinates
+                    boxes = self.detect_frame(frame)
                     
-                    # Update detection streak
-                    if detected_weapons:
-                        detection_streak += 1
+                    if self.tracker is not None:
+                        self.tracker.update(boxes, time.time())
+                        detection_streak = self.tracker.max_streak()
                     else:
-                        detection_streak = 0
-                else:
-                    # Use cached detections for frames we skip processing
-                    detected_weapons = cached_detections
-                
-                # Scale detection boxes to display frame size if needed
-                scale_x = display_frame.shape[1] / 416
-                scale_y = display_frame.shape[0] / 312
-                
-                # If weapons are detected or we have a detection streak, trigger alarm
-                current_time = time.time()
-                if (detected_weapons or detection_streak >= 2) and current_time > alarm_cooldown:
-                    if not alarm_active:
-                        # Play alarm sound
-                        self.alarm_sound.play(-1)
-                        alarm_active = True
+                        # Update our cache
+                        detected_weapons = self.boxes_to_detections(boxes)
+                        cached_detections = detected_weapons
                         
-                        # Save a snapshot
+                        # Update detection streak
                         if detected_weapons:
-                            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                            full_path = str(self.save_dir / f"weapon_{timestamp}.jpg")
-                            cv2.imwrite(full_path, display_frame)
-                            
-                        # Set alarm cooldown
-                        alarm_cooldown = current_time + 3  # Reduced cooldown to 3 seconds
-                elif not detected_weapons and detection_streak < 2 and alarm_active:
-                    # Stop alarm if no weapons are detected
-                    pygame.mixer.stop()
-                    alarm_active = False
+                            detection_streak += 1
+                        else:
+                            detection_streak = 0
+                else:
+                    if self.metrics is not None:
+                        self.metrics.inc("frames_skipped_total")
+                    if self.tracker is None:
+                        # Use cached detections for frames we skip processing
+                        detected_weapons = cached_detections
+
+                if self.tracker is not None:
+                    # Tracked boxes predicted to the current frame; only tracks the
+                    # model still sees count for the alarm, coasting ones are just drawn
+                    now = time.time()
+                    detected_weapons = self.tracks_to_detections(self.tracker.predict(now))
+                    alarm_weapons = self.tracks_to_detections(self.tracker.predict(now, matched_only=True))
+                else:
+                    alarm_weapons = detected_weapons
+
+                # Publish fresh detections only, not the cached/predicted ones
+                if processed:
+                    self.publish_detections(alarm_weapons)
+                
+                self.handle_alarm(alarm_weapons, detection_streak, display_frame)
                 
                 # Draw detection results on the display frame
-                for weapon in detected_weapons:
-                    x1, y1, x2, y2 = weapon['box']
-                    
-                    # Scale coordinates if frame was resized
-                    if self.frame_count % self.process_every_n_frames != 0:
-                        x1, x2 = int(x1 * scale_x), int(x2 * scale_x)
-                        y1, y2 = int(y1 * scale_y), int(y2 * scale_y)
-                    
-                    weapon_class = weapon['class']
-                    confidence = weapon['confidence']
-                    
-                    # Use rectangle with filled red background for better visibility
-                    cv2.rectangle(display_frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-                    
-                    # Enhanced label with confidence
-                    label = f"{weapon_class} ({confidence:.2f})"
-                    cv2.putText(display_frame, label, (x1, y1 - 5),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+                if draw:
+                    with self.timer.stage('draw'):
+                        self.draw_detections(display_frame, detected_weapons)
                 
                 # Calculate FPS
                 fps_frame_count += 1
@@ -242,55 +535,172 @@ class WeaponDetectionSystem:
                     fps_start_time = current_time
                     fps_frame_count = 0
                 
-                # Add status information
-                if detected_weapons:
-                    status_text = f"ALERT! {len(detected_weapons)} weapon(s)"
-                    cv2.putText(display_frame, status_text, (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-                else:
-                    cv2.putText(display_frame, "No weapons detected", (10, 30),
-                               cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Add FPS counter
-                cv2.putText(display_frame, f"FPS: {fps:.1f}", (10, 60),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+                if draw:
+                    with self.timer.stage('draw'):
+                        self.draw_status(display_frame, detected_weapons, fps)
+                self.timer.frame_done()
                 
-                # Add detection mode info
-                detection_mode = "HIGH SENSITIVITY" if self.model.conf <= 0.2 else "NORMAL"
-                cv2.putText(display_frame, f"Mode: {detection_mode}", (10, 90),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 1)
+                if headless:
+                    continue
                 
                 # Display the frame
-                cv2.imshow("Enhanced Weapon Detection System", display_frame)
+                self.show("Enhanced Weapon Detection System", display_frame)
                 
                 # Handle keyboard input
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q'):
+                if not self.handle_key(cv2.waitKey(1) & 0xFF):
                     break
-                elif key == ord('s'):  # Toggle sensitivity
-                    if self.model.conf > 0.15:
-                        self.model.conf = 0.15  # Higher sensitivity
-                        print("Switched to high sensitivity mode")
-                    else:
-                        self.model.conf = 0.25  # Normal sensitivity
-                        print("Switched to normal sensitivity mode")
                 
             except Exception as e:
                 print(f"Error in main loop: {e}")
                 continue
         
+        self.timer.stop()
+        self.cleanup()
+
+    def benchmark(self, output="benchmark.json", max_frames=None, label=None):
+        """Run the full detection loop headless and write per-stage latency as JSON"""
+        previous_timer, self.timer = self.timer, StageTimer()
+        try:
+            self.run(headless=True, max_frames=max_frames)
+        finally:
+            summary = self.timer.summary()
+            self.timer = previous_timer
+        print_summary(summary)
+        write_report(summary, output, extra={
+            'label': label,
+            'device': self.device,
+            'inference_size': list(self.inference_size),
+            'process_every_n_frames': self.process_every_n_frames,
+            'model': self.model_info,
+            'motion_gate_inference_ratio': (self.motion_gate.inference_ratio()
+                                            if self.motion_gate is not None else None),
+        })
+        print(f"Benchmark written to {output}")
+        return summary
+
+    def run_pipeline(self, queue_size=1, stats_interval=5.0):
+        """Run capture, inference and rendering as separate pipeline stages"""
+        self.configure_opencv()
+        pipeline = DetectionPipeline(self, queue_size=queue_size, stats_interval=stats_interval)
+        try:
+            pipeline.run()
+        finally:
+            self.cleanup()
+
+    def cleanup(self):
         # Clean up
-        if alarm_active:
+        if self.events is not None:
+            self.events.close()
+        if self.event_store is not None:
+            self.event_store.close()
+        if self.metrics is not None:
+            self.metrics.close()
+        if self.evidence is not None:
+            self.evidence.close()
+        if self.alarm_active and self.alarm_sound is not None:
             pygame.mixer.stop()
-        self.camera.release()
-        cv2.destroyAllWindows()
+            self.alarm_active = False
+        if self.camera is not None:
+            self.camera.release()
+        if self.windows_open:
+            cv2.destroyAllWindows()
         
         # Clean up CUDA memory
         if self.device == 'cuda':
             torch.cuda.empty_cache()
             gc.collect()
 
+def make_pool_detector(weights="yolov5n.pt", conf=0.2):
+    """Build the detector of one DetectorPool worker process"""
+    detector = WeaponDetectionSystem(alarm=False, weights=weights, open_camera=False)
+    detector.model.conf = conf
+    return detector
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Real-time weapon detection")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run capture, inference and display in separate threads")
+    parser.add_argument("--queue-size", type=int, default=1,
+                        help="depth of each pipeline stage queue (default: 1, latest frame only)")
+    parser.add_argument("--source", default=None,
+                        help="video file, image directory or 'synthetic' instead of the webcam")
+    parser.add_argument("--loop", type=int, default=1,
+                        help="number of passes over a video file or image directory")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="run headless and report FPS and per-stage latency")
+    parser.add_argument("--frames", type=int, default=None,
+                        help="stop after this many frames (synthetic source default: 300)")
+    parser.add_argument("--output", default=None,
+                        help="where to write the JSON report (default: benchmark.json, "
+                             "cpu_compare.json with --cpu-compare)")
+    parser.add_argument("--weights", default="yolov5n.pt",
+                        help="local YOLOv5 weights file (default: yolov5n.pt)")
+    parser.add_argument("--no-export", action="store_true",
+                        help="load the plain weights instead of a cached TorchScript export")
+    parser.add_argument("--motion-gate", action="store_true",
+                        help="only run the model when the scene changes (plus a slow heartbeat)")
+    parser.add_argument("--idle-every", type=int, default=30,
+                        help="with --motion-gate, frames between heartbeat passes on a static scene")
+    parser.add_argument("--track", action="store_true",
+                        help="track detections between model runs for smooth, stable boxes")
+    parser.add_argument("--clips", action="store_true",
+                        help="save a pre/post-event video clip with every alarm (background writer)")
+    parser.add_argument("--clip-seconds", type=float, default=3.0,
+                        help="seconds of video kept before and after each alarm")
+    parser.add_argument("--ring-mb", type=int, default=256,
+                        help="memory budget of the clip ring buffer in MB")
+    parser.add_argument("--tiles", action="store_true",
+                        help="run the model on overlapping native-resolution tiles (better for small objects)")
+    parser.add_argument("--tile-size", type=int, default=640,
+                        help="tile size in pixels for --tiles")
+    parser.add_argument("--tile-overlap", type=float, default=0.2,
+                        help="fraction of overlap between neighbouring tiles")
+    parser.add_argument("--roi", action="append", type=parse_roi, default=[], metavar="X1,Y1,X2,Y2",
+                        help="only run the model on this region (native pixels), can be repeated")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="serve Prometheus metrics on http://127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-jsonl", default=None,
+                        help="append a metrics snapshot to this JSONL file every --metrics-interval seconds")
+    parser.add_argument("--metrics-interval", type=float, default=10.0,
+                        help="seconds between JSONL metrics snapshots")
+    parser.add_argument("--headless", action="store_true",
+                        help="no window, no overlays and no alarm sound (server mode)")
+    parser.add_argument("--events", default=None, metavar="SINK",
+                        help="publish detection events to a JSONL file, unix:/path/to.sock or tcp:host:port")
+    parser.add_argument("--camera-name", default="camera0",
+                        help="camera name used in published events")
+    parser.add_argument("--cpu-optimize", action="store_true",
+                        help="tuned CPU path: shared thread budget, channels-last model, warm-up")
+    parser.add_argument("--threads", type=int, default=4,
+                        help="threads for OpenCV and torch with --cpu-optimize")
+    parser.add_argument("--cpu-compare", default=None, metavar="CLIP",
+                        help="compare float vs optimized CPU model on a replay clip and exit")
+    parser.add_argument("--camera", action="append", default=[], metavar="NAME=SOURCE[,conf=C][,every=N]",
+                        help="serve several cameras with one batched model, can be repeated "
+                             "(SOURCE is a webcam index, video file, image folder or 'synthetic')")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="with --camera, run inference in this many worker processes (shared-memory frames)")
+    parser.add_argument("--threads-per-worker", type=int, default=1,
+                        help="torch threads in each --workers process")
+    parser.add_argument("--store", nargs="?", const="detected_weapons/events.db", default=None,
+                        metavar="DB", help="keep every detection in an indexed SQLite file "
+                                           "(default: detected_weapons/events.db), see event_store.py")
+    args = parser.parse_args()
+    if args.camera:
+        # Multi-camera mode keeps no per-camera clip ring, tracker, motion gate or tiles
+        unsupported = [flag for flag, used in (("--clips", args.clips), ("--track", args.track),
+                                               ("--motion-gate", args.motion_gate),
+                                               ("--tiles", args.tiles), ("--roi", args.roi)) if used]
+        if unsupported:
+            parser.error(f"{', '.join(unsupported)} can't be combined with --camera")
+    if args.threads < 1:
+        parser.error("--threads must be at least 1")
+    if args.output is None:
+        args.output = "cpu_compare.json" if args.cpu_compare else "benchmark.json"
+    if args.headless and args.pipeline:
+        # The pipeline's render stage is the window; there is no headless pipeline
+        parser.error("--headless can't be combined with --pipeline")
+
     try:
         # Check if we need to create a dummy alarm file
         if not os.path.exists("alarm.wav"):
@@ -309,8 +719,83 @@ if __name__ == "__main__":
             print("Created alarm.wav file")
             
         # Create and run the detection system
-        weapon_detector = WeaponDetectionSystem()
-        weapon_detector.run()
+        source = None
+        if args.cpu_compare and not args.source:
+            args.source = args.cpu_compare  # don't open the webcam for a comparison run
+        if args.source:
+            source = open_source(args.source, loop=args.loop, num_frames=args.frames or 300)
+        weapon_detector = WeaponDetectionSystem(source=source,
+                                                alarm=not (args.benchmark or args.headless),
+                                                weights=args.weights,
+                                                # channels-last and batched or tiled inference
+                                                # need the plain PyTorch model
+                                                export_model=not (args.no_export or args.cpu_optimize
+                                                                  or args.cpu_compare or args.tiles
+                                                                  or args.roi
+                                                                  or (args.camera and args.workers == 0)),
+                                                open_camera=not args.camera)
+        if args.motion_gate:
+            weapon_detector.motion_gate = MotionGate(idle_every=args.idle_every)
+        if args.clips:
+            weapon_detector.evidence = EvidenceWriter(weapon_detector.save_dir,
+                                                      ring=FrameRing(budget_mb=args.ring_mb),
+                                                      pre_seconds=args.clip_seconds,
+                                                      post_seconds=args.clip_seconds)
+        if args.cpu_compare:
+            clip = open_source(args.cpu_compare, num_frames=args.frames or 200)
+            frames = []
+            while len(frames) < (args.frames or 200):
+                ret, frame = clip.read()
+                if not ret:
+                    break
+                frames.append(frame)
+            clip.release()
+            cpu_tuning.compare_modes(weapon_detector, frames, output=args.output,
+                                     num_threads=args.threads)
+            raise SystemExit(0)
+        if args.cpu_optimize:
+            cpu_tuning.optimize_for_cpu(weapon_detector, num_threads=args.threads)
+        if args.tiles or args.roi:
+            weapon_detector.tiler = TiledDetector(weapon_detector, regions=args.roi or None,
+                                                  tile_size=args.tile_size,
+                                                  overlap=args.tile_overlap)
+        if args.track:
+            weapon_detector.tracker = WeaponTracker()
+        weapon_detector.camera_name = args.camera_name
+        if args.events:
+            weapon_detector.events = EventStream(open_sink(args.events), camera=args.camera_name)
+        if args.store:
+            weapon_detector.event_store = EventStore(args.store)
+        if args.metrics_port is not None or args.metrics_jsonl:
+            metrics = Metrics()
+            weapon_detector.install_metrics(metrics)
+            if args.metrics_port is not None:
+                metrics.serve_http(args.metrics_port)
+            if args.metrics_jsonl:
+                metrics.start_jsonl(args.metrics_jsonl, interval=args.metrics_interval)
+        if args.camera:
+            cameras = []
+            for spec in map(parse_camera_spec, args.camera):
+                cameras.append(CameraStream(spec['name'], open_camera_source(spec['source']),
+                                            conf=spec['conf'], process_every_n_frames=spec['every']))
+            if args.workers > 0:
+                # The parent's model was loaded above, so the TorchScript cache exists for the workers
+                factory = partial(make_pool_detector, weights=args.weights,
+                                  conf=min(camera.conf for camera in cameras))
+                pool = DetectorPool(factory, workers=args.workers,
+                                    threads_per_worker=args.threads_per_worker)
+                PooledMultiCameraDetector(weapon_detector, cameras, pool, headless=args.headless).run()
+            else:
+                MultiCameraDetector(weapon_detector, cameras, headless=args.headless).run()
+        elif args.benchmark:
+            weapon_detector.benchmark(output=args.output, max_frames=args.frames,
+                                      label=args.source or "camera")
+        elif args.headless:
+            weapon_detector.run(headless=True, draw=False)
+        elif args.pipeline:
+            weapon_detector.run_pipeline(queue_size=args.queue_size)
+        else:
+            weapon_detector.run()
         
     except Exception as e:
         print(f"Error: {e}")
\ No newline at end of file
@@ -0,0 +1,159 @@
+"""Lightweight multi-object tracker for weapon boxes.
+
+Between model runs the detector used to redraw the last detections as they
+were. The tracker instead gives every detection a stable track ID, smooths it
+with a small constant-velocity Kalman filter, and extrapolates the box to the
+current time on frames where the model did not run, so the model can run less
+often and the overlay still follows the object.
+
+Boxes are handled as float arrays of (x1, y1, x2, y2, confidence, class_id),
+the same layout ``detect_weapons_array`` returns, in display coordinates.
+"""
+import itertools
+
+import numpy as np
+
+
+def box_iou(a, b):
+    """Pairwise IoU between (N, 4+) and (M, 4+) xyxy box arrays"""
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)), dtype=np.float32)
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-6)
+
+
+def xyxy_to_cxcywh(box):
+    x1, y1, x2, y2 = box[:4]
+    return np.array([(x1 + x2) / 2, (y1 + y2) / 2, x2 - x1, y2 - y1], dtype=np.float64)
+
+
+def cxcywh_to_xyxy(state):
+    cx, cy, w, h = state[:4]
+    w, h = max(w, 1.0), max(h, 1.0)
+    return np.array([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2])
+
+
+class Track:
+    """One tracked object with a constant-velocity Kalman filter.
+
+    State is (cx, cy, w, h, vcx, vcy, vw, vh), velocities in pixels/second.
+    """
+
+    def __init__(self, track_id, box, timestamp):
+        self.track_id = track_id
+        self.class_id = int(box[5])
+        self.confidence = float(box[4])
+        self.x = np.zeros(8)
+        self.x[:4] = xyxy_to_cxcywh(box)
+        self.P = np.diag([10.0, 10.0, 10.0, 10.0, 1000.0, 1000.0, 1000.0, 1000.0])
+        self.timestamp = timestamp
+        self.hits = 1        # consecutive model runs that matched this track
+        self.misses = 0      # consecutive model runs without a match
+        self.last_seen = timestamp
+        self.confirmed = False
+
+    def predict(self, timestamp):
+        """Advance the filter to timestamp"""
+        dt = max(0.0, timestamp - self.timestamp)
+        F = np.eye(8)
+        F[:4, 4:] = np.eye(4) * dt
+        Q = np.eye(8) * 1.0
+        Q[4:, 4:] *= 50.0
+        self.x = F @ self.x
+        self.P = F @ self.P @ F.T + Q * max(dt, 1e-3)
+        self.timestamp = timestamp
+
+    def correct(self, box):
+        """Fold a matched detection into the filter"""
+        H = np.zeros((4, 8))
+        H[:4, :4] = np.eye(4)
+        R = np.eye(4) * 4.0
+        y = xyxy_to_cxcywh(box) - H @ self.x
+        S = H @ self.P @ H.T + R
+        K = self.P @ H.T @ np.linalg.inv(S)
+        self.x = self.x + K @ y
+        self.P = (np.eye(8) - K @ H) @ self.P
+        self.class_id = int(box[5])
+        self.confidence = float(box[4])
+        self.hits += 1
+        self.misses = 0
+        self.last_seen = self.timestamp
+
+    def box_at(self, timestamp, max_extrapolation=0.5):
+        """Box extrapolated to timestamp without changing the filter state"""
+        dt = min(max(0.0, timestamp - self.timestamp), max_extrapolation)
+        state = self.x[:4] + self.x[4:] * dt
+        return cxcywh_to_xyxy(state)
+
+
+class WeaponTracker:
+    """Associate detections to tracks by IoU and predict boxes between runs.
+
+    ``update`` is called with the model output whenever the model ran;
+    ``predict`` can be called on any frame to get the current boxes.
+    """
+
+    def __init__(self, iou_threshold=0.3, max_misses=3, max_age=1.0, min_hits=1):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses  # model runs a track survives without a match
+        self.max_age = max_age        # seconds a track survives without a match
+        self.min_hits = min_hits      # matches needed before a track is reported
+        self.tracks = []
+        self.ids = itertools.count(1)
+
+    def update(self, boxes, timestamp):
+        """Match an (N, 6) detection array to the current tracks"""
+        for track in self.tracks:
+            track.predict(timestamp)
+
+        predicted = np.array([track.box_at(timestamp) for track in self.tracks]).reshape(-1, 4)
+        iou = box_iou(predicted, boxes)
+
+        # Greedy association, best IoU first
+        matched_tracks, matched_boxes = set(), set()
+        if iou.size:
+            for flat in np.argsort(-iou, axis=None):
+                t, b = np.unravel_index(flat, iou.shape)
+                if iou[t, b] < self.iou_threshold:
+                    break
+                if t in matched_tracks or b in matched_boxes:
+                    continue
+                self.tracks[t].correct(boxes[b])
+                matched_tracks.add(t)
+                matched_boxes.add(b)
+
+        for t, track in enumerate(self.tracks):
+            if t not in matched_tracks:
+                track.misses += 1
+                track.hits = 0
+        for b in range(len(boxes)):
+            if b not in matched_boxes:
+                self.tracks.append(Track(next(self.ids), boxes[b], timestamp))
+
+        for track in self.tracks:
+            if track.hits >= self.min_hits:
+                track.confirmed = True
+        self.tracks = [track for track in self.tracks
+                       if track.misses <= self.max_misses
+                       and timestamp - track.last_seen <= self.max_age]
+
+    def predict(self, timestamp, matched_only=False):
+        """Current reportable tracks as (track_id, box xyxy, confidence, class_id).
+
+        Tracks the last model run didn't match keep coasting for a while so
+        the overlay stays smooth; ``matched_only`` leaves them out, for
+        alarms and events that must stop when the weapon is gone.
+        """
+        return [(track.track_id, track.box_at(timestamp), track.confidence, track.class_id)
+                for track in self.tracks
+                if track.confirmed and not (matched_only and track.misses)]
+
+    def max_streak(self):
+        """Longest run of consecutive matches among tracks matched on the last run"""
+        return max((track.hits for track in self.tracks if not track.misses), default=0)
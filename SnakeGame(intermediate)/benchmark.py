@@ -0,0 +1,61 @@
+"""Per-frame timing for headless benchmark runs."""
+import json
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+
+class FrameTimer:
+    def __init__(self):
+        self.samples = {}  # stage name -> list of seconds, one per frame
+        self.frames = 0
+        self.started = None
+        self.elapsed = 0.0
+
+    def start(self):
+        self.started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(name, []).append(time.perf_counter() - start)
+
+    def frame_done(self):
+        self.frames += 1
+
+    def stop(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    def summary(self):
+        stages = {}
+        for name, values in self.samples.items():
+            ms = np.array(values) * 1000
+            stages[name] = {
+                "mean_ms": float(ms.mean()),
+                "p50_ms": float(np.percentile(ms, 50)),
+                "p95_ms": float(np.percentile(ms, 95)),
+                "max_ms": float(ms.max()),
+            }
+        return {
+            "frames": self.frames,
+            "seconds": self.elapsed,
+            "fps": self.frames / self.elapsed if self.elapsed else 0.0,
+            "stages": stages,
+        }
+
+
+def print_summary(summary):
+    print(f"{summary['frames']} frames in {summary['seconds']:.2f}s ({summary['fps']:.1f} FPS)")
+    for name, stats in summary["stages"].items():
+        print(f"  {name:<8} mean {stats['mean_ms']:7.3f} ms  p50 {stats['p50_ms']:7.3f}  "
+              f"p95 {stats['p95_ms']:7.3f}  max {stats['max_ms']:7.3f}")
+
+
+def write_report(summary, path):
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
+    print(f"Report written to {path}")
@@ -0,0 +1,229 @@
+"""Record whole snake games in a few bytes and replay them deterministically.
+
+A game is fully determined by the food seed, the board size and the ticks
+on which the snake turned, so that is all a log stores. File layout
+(little endian)::
+
+    header  b"SNK1" | uint32 seed | uint16 cols | uint16 rows
+            uint32 ticks | uint32 final score | uint32 turn count
+    turns   bit-packed, per turn: the ticks since the previous turn as an
+            Elias gamma code, then 1 bit, 1 = clockwise, 0 = counter-clockwise
+
+The snake can only turn left or right of its heading, so one bit is the
+whole direction change; a turn a few ticks after the previous one costs
+4-6 bits. A typical game of a few thousand ticks fits in a few hundred
+bytes.
+
+``GameReplay`` rebuilds the game on ``SnakeLogic`` with rendering off, at
+hundreds of thousands of ticks per second, and keeps a state snapshot every
+``snapshot_every`` ticks so ``seek`` to any tick replays at most that many
+ticks. Logs from either snake game replay here, and ``snakegame2.py
+--watch`` shows one in the game window::
+
+    python game_log.py game.snk --seek 1500
+"""
+import argparse
+import struct
+import time
+
+from snake_logic import COLS, ROWS, RIGHT, SnakeLogic
+
+MAGIC = b"SNK1"
+HEADER = struct.Struct("<4sIHHIII")
+MAX_SEED = 2 ** 32 - 1  # stored as uint32
+
+
+def check_seed(seed):
+    if not 0 <= seed <= MAX_SEED:
+        raise ValueError(f"Seed must be between 0 and {MAX_SEED}, got {seed}")
+
+
+def parse_seed(text):
+    """argparse type for --seed, so a bad seed fails at start-up, not when the log is saved"""
+    try:
+        seed = int(text)
+        check_seed(seed)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    return seed
+
+
+class BitWriter:
+    def __init__(self):
+        self.data = bytearray()
+        self.acc = 0
+        self.bits = 0  # bits in acc not yet flushed to data
+
+    def write(self, value, width):
+        self.acc = (self.acc << width) | value
+        self.bits += width
+        while self.bits >= 8:
+            self.bits -= 8
+            self.data.append((self.acc >> self.bits) & 0xFF)
+        self.acc &= (1 << self.bits) - 1
+
+    def write_gamma(self, n):
+        """Elias gamma code of n >= 1: bit length - 1 zeros, then n itself"""
+        width = n.bit_length()
+        self.write(0, width - 1)
+        self.write(n, width)
+
+    def getvalue(self):
+        if self.bits:
+            return bytes(self.data) + bytes([(self.acc << (8 - self.bits)) & 0xFF])
+        return bytes(self.data)
+
+
+class BitReader:
+    def __init__(self, data):
+        self.bits = "".join(f"{byte:08b}" for byte in data)
+        self.position = 0
+
+    def read(self, width):
+        value = int(self.bits[self.position:self.position + width], 2)
+        self.position += width
+        return value
+
+    def read_gamma(self):
+        zeros = self.bits.index("1", self.position) - self.position
+        self.position += zeros
+        return self.read(zeros + 1)
+
+
+class GameLog:
+    """Seed, board size and turns of one game.
+
+    A game calls ``record`` once per tick with the direction (UP/RIGHT/DOWN/
+    LEFT) of the move it's about to make; only changes are kept.
+    """
+    def __init__(self, seed, cols=COLS, rows=ROWS):
+        check_seed(seed)
+        self.seed, self.cols, self.rows = seed, cols, rows
+        self.ticks = 0
+        self.score = 0
+        self.turns = []  # (tick, direction) for every tick the heading changed
+        self.direction = RIGHT  # every game starts heading right
+
+    def record(self, direction):
+        if direction != self.direction:
+            if direction == (self.direction + 2) % 4:
+                raise ValueError(f"Tick {self.ticks}: the snake can't reverse")
+            self.turns.append((self.ticks, direction))
+            self.direction = direction
+        self.ticks += 1
+
+    def directions(self):
+        """The direction of every recorded tick, in order"""
+        direction = RIGHT
+        turns = iter(self.turns)
+        turn = next(turns, None)
+        for tick in range(self.ticks):
+            if turn is not None and turn[0] == tick:
+                direction = turn[1]
+                turn = next(turns, None)
+            yield direction
+
+    def save(self, path):
+        bits = BitWriter()
+        previous, direction = -1, RIGHT
+        for tick, new_direction in self.turns:
+            bits.write_gamma(tick - previous)
+            bits.write(new_direction == (direction + 1) % 4, 1)
+            previous, direction = tick, new_direction
+        with open(path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.seed, self.cols, self.rows,
+                                self.ticks, self.score, len(self.turns)))
+            f.write(bits.getvalue())
+
+
+def read_game(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, seed, cols, rows, ticks, score, count = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a snake game log")
+    log = GameLog(seed, cols, rows)
+    log.ticks, log.score = ticks, score
+    bits = BitReader(data[HEADER.size:])
+    tick, direction = -1, RIGHT
+    for _ in range(count):
+        tick += bits.read_gamma()
+        direction = (direction + (1 if bits.read(1) else -1)) % 4
+        log.turns.append((tick, direction))
+    log.direction = direction
+    return log
+
+
+class GameReplay:
+    """Plays a ``GameLog`` back on ``SnakeLogic``, tick by tick or by seeking.
+
+    ``game`` is the live ``SnakeLogic``; read its body, food and score after
+    ``step`` or ``seek``.
+    """
+    def __init__(self, log, snapshot_every=500):
+        self.log = log
+        self.snapshot_every = snapshot_every
+        self.game = SnakeLogic(log.cols, log.rows, log.seed)
+        self.next_turn = 0  # index into log.turns
+        self.snapshots = {0: (self.game.snapshot(), 0)}  # tick -> (state, next_turn)
+
+    @property
+    def tick(self):
+        return self.game.ticks
+
+    @property
+    def finished(self):
+        return self.game.done or self.game.ticks >= self.log.ticks
+
+    def step(self):
+        """Replay one tick, returns (reward, done) like ``SnakeLogic.step``"""
+        if self.finished:
+            return 0, True
+        game, turns = self.game, self.log.turns
+        action = None
+        if self.next_turn < len(turns) and turns[self.next_turn][0] == game.ticks:
+            action = turns[self.next_turn][1]
+            self.next_turn += 1
+        result = game.step(action)
+        if game.ticks % self.snapshot_every == 0 and game.ticks not in self.snapshots:
+            self.snapshots[game.ticks] = (game.snapshot(), self.next_turn)
+        return result
+
+    def seek(self, tick):
+        """Put the game in its state after ``tick`` ticks (clamped to the log)"""
+        tick = max(0, min(tick, self.log.ticks))
+        # Snapshots are taken on the way forward, so they exist up to the furthest tick played
+        base = min(tick - tick % self.snapshot_every, max(self.snapshots))
+        if not base <= self.game.ticks <= tick:
+            state, self.next_turn = self.snapshots[base]
+            self.game.restore(state)
+        while self.game.ticks < tick and not self.game.done:
+            self.step()
+        return self.game
+
+    def fast_forward(self):
+        """Play to the end of the log"""
+        return self.seek(self.log.ticks)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay a recorded snake game without rendering")
+    parser.add_argument("log", help="game log written with --save-game")
+    parser.add_argument("--seek", type=int, default=None, help="show the state after this many ticks")
+    args = parser.parse_args()
+
+    log = read_game(args.log)
+    print(f"{args.log}: seed {log.seed}, {log.cols}x{log.rows} board, "
+          f"{log.ticks} ticks, {len(log.turns)} turns, score {log.score}")
+    replay = GameReplay(log)
+    start = time.perf_counter()
+    game = replay.fast_forward()
+    elapsed = time.perf_counter() - start
+    print(f"Replayed {game.ticks} ticks in {elapsed * 1000:.1f} ms "
+          f"({game.ticks / max(elapsed, 1e-9):,.0f} ticks/s), score {game.score}")
+    if game.score != log.score:
+        print(f"Warning: the recorded game ended with score {log.score}, the replay diverged")
+    if args.seek is not None:
+        game = replay.seek(args.seek)
+        print(f"Tick {game.ticks}: score {game.score}, length {len(game.body)}, "
+              f"head {game.body[0]}, food {game.food}")
@@ -0,0 +1,104 @@
+"""Hand tracking in a background thread, so the game never waits for the camera.
+
+Reading the webcam and running MediaPipe Hands can take longer than a game
+tick. ``HandTracker`` does both on a worker thread over a downscaled copy
+of each frame and publishes only the newest result; each tick steers with
+whatever ``latest()`` holds at that moment.
+
+Landmarks are (21, 3) float32 arrays of MediaPipe's normalized x, y, z.
+"""
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+class HandTracker:
+    def __init__(self, camera=0, inference_width=320, preview=True,
+                 min_detection_confidence=0.7, min_tracking_confidence=0.5):
+        self.camera = camera
+        self.inference_width = inference_width  # frames are shrunk to this width for MediaPipe
+        self.preview = preview                  # keep an annotated frame for cv2.imshow
+        self.confidence = (min_detection_confidence, min_tracking_confidence)
+        self.lock = threading.Lock()
+        self.landmarks = None
+        self.timestamp = 0.0
+        self.sequence = 0     # increases with every processed frame
+        self.frame = None
+        self.running = False
+        self.finished = False  # camera closed or failed
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.worker, name="hand-tracker", daemon=True)
+        self.thread.start()
+        return self
+
+    def latest(self):
+        """(landmarks or None, capture timestamp, sequence number)"""
+        with self.lock:
+            return self.landmarks, self.timestamp, self.sequence
+
+    def latest_frame(self):
+        with self.lock:
+            return self.frame
+
+    def worker(self):
+        try:
+            import mediapipe as mp
+        except ImportError:
+            self.finished = True  # let the caller stop instead of waiting for landmarks
+            raise
+
+        mp_hands = mp.solutions.hands
+        mp_draw = mp.solutions.drawing_utils
+        hands = mp_hands.Hands(
+            static_image_mode=False,
+            max_num_hands=1,
+            min_detection_confidence=self.confidence[0],
+            min_tracking_confidence=self.confidence[1]
+        )
+        cap = cv2.VideoCapture(self.camera)
+        small = None
+        try:
+            while self.running:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                timestamp = time.perf_counter()
+                frame = cv2.flip(frame, 1)
+
+                # Landmarks are normalized, so a smaller input gives the same coordinates
+                height, width = frame.shape[:2]
+                if width > self.inference_width:
+                    size = (self.inference_width, int(height * self.inference_width / width))
+                    small = cv2.resize(frame, size, dst=small, interpolation=cv2.INTER_AREA)
+                else:
+                    small = frame
+                results = hands.process(cv2.cvtColor(small, cv2.COLOR_BGR2RGB))
+
+                landmarks = None
+                if results.multi_hand_landmarks:
+                    hand_landmarks = results.multi_hand_landmarks[0]  # Get first hand
+                    landmarks = np.array([(p.x, p.y, p.z) for p in hand_landmarks.landmark],
+                                         dtype=np.float32)
+                    if self.preview:
+                        mp_draw.draw_landmarks(frame, hand_landmarks, mp_hands.HAND_CONNECTIONS)
+
+                with self.lock:
+                    self.landmarks = landmarks
+                    self.timestamp = timestamp
+                    self.sequence += 1
+                    if self.preview:
+                        self.frame = frame
+        finally:
+            self.finished = True
+            cap.release()
+            hands.close()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
@@ -0,0 +1,151 @@
+"""Snake rules without pygame, for the games, bots, tests and replays.
+
+``SnakeLogic`` is the one copy of the rules: both snake games step it every
+tick and only draw its cells, and with its own seeded random generator
+``step(action)`` can also run as fast as Python allows:
+
+    game = SnakeLogic(seed=1)
+    while not game.done:
+        reward, done = game.step(RIGHT)
+
+For thousands of boards at once see ``snake_batch.BatchSnake``.
+``game_log.GameReplay`` uses it to replay recorded games.
+"""
+import random
+from collections import deque
+
+UP, RIGHT, DOWN, LEFT = range(4)
+DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))  # (dx, dy) per action
+
+COLS, ROWS = 54, 36  # the 1080x720 window in 20 px cells
+START_BODY = ((5, 5), (4, 5), (3, 5))
+MIN_SIZE = 7  # room for the starting snake and a cell ahead of it
+
+
+def check_board(cols, rows):
+    if cols < MIN_SIZE or rows < MIN_SIZE:
+        raise ValueError(f"Board must be at least {MIN_SIZE}x{MIN_SIZE} cells, got {cols}x{rows}")
+
+
+class FreeCells:
+    """Board cells not covered by the snake, so food always lands on an empty cell.
+
+    The cells live in a list plus a cell -> position map. Removing a cell
+    moves the last one into its slot, so add, remove and a random pick are
+    all O(1) however full the board is.
+    """
+    def __init__(self, width=COLS, height=ROWS):
+        self.width, self.height = width, height
+        self.cells = [(x, y) for y in range(height) for x in range(width)]
+        self.index = {cell: i for i, cell in enumerate(self.cells)}
+
+    def on_board(self, cell):
+        x, y = cell
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def remove(self, cell):
+        i = self.index.pop(cell, None)
+        if i is None:
+            return
+        last = self.cells.pop()
+        if i < len(self.cells):
+            self.cells[i] = last
+            self.index[last] = i
+
+    def add(self, cell):
+        if cell not in self.index and self.on_board(cell):
+            self.index[cell] = len(self.cells)
+            self.cells.append(cell)
+
+    def choice(self, rng=random):
+        return rng.choice(self.cells) if self.cells else None
+
+    def __len__(self):
+        return len(self.cells)
+
+
+class SnakeLogic:
+    def __init__(self, cols=COLS, rows=ROWS, seed=None):
+        check_board(cols, rows)
+        self.cols, self.rows = cols, rows
+        self.seed = seed
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        self.rng = random.Random(self.seed if seed is None else seed)
+        self.free_cells = FreeCells(self.cols, self.rows)
+        self.body = deque()
+        self.occupied = {}  # segments per cell, grow() stacks two on the tail
+        for cell in START_BODY:
+            self.body.append(cell)
+            self.occupy(cell)
+        self.direction = RIGHT
+        self.food = self.free_cells.choice(self.rng)
+        self.score = 0
+        self.ticks = 0
+        self.done = False
+
+    def occupy(self, cell):
+        count = self.occupied.get(cell, 0)
+        self.occupied[cell] = count + 1
+        if not count:
+            self.free_cells.remove(cell)
+
+    def vacate(self, cell):
+        count = self.occupied[cell] - 1
+        if count:
+            self.occupied[cell] = count
+        else:
+            del self.occupied[cell]
+            self.free_cells.add(cell)
+
+    def snapshot(self):
+        """Everything ``step`` depends on, to ``restore`` later (e.g. seeking a replay)"""
+        # Free cell order matters: food is picked by position in that list
+        return (self.rng.getstate(), tuple(self.body), tuple(self.free_cells.cells),
+                self.direction, self.food, self.score, self.ticks, self.done)
+
+    def restore(self, state):
+        rng_state, body, cells, self.direction, self.food, self.score, self.ticks, self.done = state
+        self.rng.setstate(rng_state)
+        self.body = deque(body)
+        self.occupied = {}
+        for cell in body:
+            self.occupied[cell] = self.occupied.get(cell, 0) + 1
+        self.free_cells.cells = list(cells)
+        self.free_cells.index = {cell: i for i, cell in enumerate(cells)}
+
+    def change_direction(self, action):
+        if action is not None and action != (self.direction + 2) % 4:  # no reversing
+            self.direction = action
+
+    def step(self, action=None):
+        """Advance one tick. ``action`` is UP/RIGHT/DOWN/LEFT or None to keep going.
+
+        Returns (reward, done): reward is 1 for eating, -1 for dying, else 0.
+        """
+        if self.done:
+            return 0, True
+        self.change_direction(action)
+        dx, dy = DIRECTIONS[self.direction]
+        x, y = self.body[0]
+        head = (x + dx, y + dy)
+        self.body.appendleft(head)
+        self.occupy(head)
+        self.vacate(self.body.pop())
+        self.ticks += 1
+
+        reward = 0
+        if head == self.food:
+            self.body.append(self.body[-1])
+            self.occupy(self.body[-1])
+            self.food = self.free_cells.choice(self.rng)
+            self.score += 1
+            reward = 1
+            if self.food is None:
+                self.done = True  # the snake fills the whole board
+        x, y = head
+        if not (0 <= x < self.cols and 0 <= y < self.rows) or self.occupied[head] > 1:
+            self.done = True
+            reward = -1
+        return reward, self.done
@@ -1,8 +1,16 @@
+import argparse
+import os
+import time
 import pygame
 import random
 from pygame import RESIZABLE
 import cv2
-import mediapipe as mp
+
+from benchmark import FrameTimer, print_summary, write_report
+from game_log import GameLog, parse_seed
+from hand_tracking import HandTracker
+from landmark_log import LandmarkRecorder, LandmarkReplay
+from snake_logic import COLS, ROWS, UP, RIGHT, DOWN, LEFT, SnakeLogic
 
 # Constants
 WIDTH, HEIGHT = 1080, 720
@@ -16,6 +24,8 @@ class Screen:
         pygame.display.set_caption("Snake Game")
         self.clock = pygame.time.Clock()
         self.font = pygame.font.SysFont("Arial", 24)
+        self.text_key = None
+        self.text_surface = None
 
     def fill(self, color):
         self.screen.fill(color)
@@ -27,120 +37,267 @@ class Screen:
         self.clock.tick(fps)
 
     def draw_text(self, text, position, color=WHITE):
-        text_surface = self.font.render(text, True, color)
-        self.screen.blit(text_surface, position)
+        # Render only when the text changes; blitting the cached surface is cheap
+        if (text, color) != self.text_key:
+            self.text_key = (text, color)
+            self.text_surface = self.font.render(text, True, color)
+        return self.screen.blit(self.text_surface, position)
 
-class Snake:
-    def __init__(self):
-        self.body = [(100, 100), (80, 100), (60, 100)]
-        self.direction = (CELL_SIZE, 0)
+def cell_rect(cell):
+    """Window rectangle of a board cell"""
+    return pygame.Rect(cell[0] * CELL_SIZE, cell[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
 
-    def move(self):
-        new_head = (self.body[0][0] + self.direction[0], self.body[0][1] + self.direction[1])
-        self.body.insert(0, new_head)
-        self.body.pop()
+class IncrementalRenderer:
+    """Redraws only the cells that changed since the previous frame.
 
-    def grow(self):
-        self.body.append(self.body[-1])
+    After one move the only changes are the new head cell, the old tail cell
+    and, after eating, the old and new food cells, plus the score label.
+    Those rectangles are repainted and pushed with
+    ``pygame.display.update(rects)``, so frame cost doesn't depend on the
+    snake's length. The whole window is redrawn on the first frame, after a
+    reset, when more than one move happened, or after ``invalidate()``
+    (window resized or exposed).
+    """
+    def __init__(self, screen):
+        self.screen = screen
+        self.full = True
+        self.game = None
+        self.ticks = 0
+        self.tail = None
+        self.food = None
+        self.label = None
+        self.label_rect = None
 
-    def check_collision(self):
-        x, y = self.body[0]
-        return x < 0 or x >= WIDTH or y < 0 or y >= HEIGHT or self.body[0] in self.body[1:]
+    def invalidate(self):
+        self.full = True
 
-    def change_direction(self, direction):
-        if (direction[0] != -self.direction[0] or direction[1] != -self.direction[1]):
-            self.direction = direction
+    def paint(self, cell, game):
+        """Repaint one cell from the current game state, return its rect"""
+        rect = cell_rect(cell)
+        if cell == game.food:
+            color = RED
+        elif cell in game.occupied:
+            color = GREEN
+        else:
+            color = BLACK
+        self.screen.screen.fill(color, rect)
+        return rect
 
-    def draw(self, screen):
-        for segment in self.body:
-            pygame.draw.rect(screen, GREEN, (*segment, CELL_SIZE, CELL_SIZE))
+    def draw(self, game, label=None):
+        # A reset turns the tick counter back, a skipped frame moves it on by more than one
+        if self.full or game is not self.game or not 0 <= game.ticks - self.ticks <= 1:
+            self.redraw(game, label)
+            return
 
-class Food:
-    def __init__(self):
-        self.position = (random.randrange(0, WIDTH, CELL_SIZE), random.randrange(0, HEIGHT, CELL_SIZE))
+        cells = {game.body[0], self.tail}
+        if game.food != self.food:
+            cells.update((self.food, game.food))
+        rects = [self.paint(cell, game) for cell in cells if cell is not None]
+
+        if label is not None and (label != self.label or self.label_rect.collidelist(rects) != -1):
+            rects.append(self.draw_label(game, label))
+
+        self.remember(game, label)
+        pygame.display.update(rects)
+
+    def draw_label(self, game, label):
+        """Repaint the cells under the old label, then blit the new one"""
+        area = self.label_rect
+        for y in range(area.top // CELL_SIZE, (area.bottom - 1) // CELL_SIZE + 1):
+            for x in range(area.left // CELL_SIZE, (area.right - 1) // CELL_SIZE + 1):
+                self.paint((x, y), game)
+        self.label_rect = self.screen.draw_text(label, (10, 10))
+        return area.union(self.label_rect)
 
-    def respawn(self):
-        self.position = (random.randrange(0, WIDTH, CELL_SIZE), random.randrange(0, HEIGHT, CELL_SIZE))
+    def redraw(self, game, label):
+        self.screen.fill(BLACK)
+        for cell in game.body:
+            self.screen.screen.fill(GREEN, cell_rect(cell))
+        if game.food is not None:
+            self.screen.screen.fill(RED, cell_rect(game.food))
+        if label is not None:
+            self.label_rect = self.screen.draw_text(label, (10, 10))
+        self.screen.update()
+        self.full = False
+        self.remember(game, label)
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, RED, (*self.position, CELL_SIZE, CELL_SIZE))
+    def remember(self, game, label):
+        self.game = game
+        self.ticks = game.ticks
+        self.tail = game.body[-1]
+        self.food = game.food
+        self.label = label
+
+INDEX_FINGER_TIP = 8
 
 class GameEngine:
-    def __init__(self):
+    def __init__(self, replay=None, record=None, headless=False, preview=True, inference_width=320,
+                 seed=None, save_game=None):
+        if headless:
+            os.environ["SDL_VIDEODRIVER"] = "dummy"  # draw to an off-screen surface
+        self.headless = headless
         self.screen = Screen()
-        self.snake = Snake()
-        self.food = Food()
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.game = SnakeLogic(COLS, ROWS, self.seed)  # the rules; this class only steers and draws
+        self.action = None  # turn to take on the next tick
+        self.renderer = IncrementalRenderer(self.screen)
+        self.running = True
+        self.gestures = None
+        self.replay = None
+        self.recorder = None
+        self.preview = preview and not headless
+        self.preview_sequence = -1
+        self.save_game = save_game
+        self.game_log = GameLog(self.seed) if save_game else None
+        if replay:
+            # Recorded landmarks replace the webcam and MediaPipe entirely
+            self.replay = LandmarkReplay(replay)
+        else:
+            # Camera and MediaPipe run on a worker thread; each tick only picks up its newest result
+            self.gestures = HandTracker(0, inference_width=inference_width, preview=self.preview,
+                                        min_detection_confidence=0.5).start()
+            if record:
+                self.recorder = LandmarkRecorder(record)
+
+    def reset(self):
+        self.game.reset()
+        self.action = None
         self.running = True
-        self.score = 0  
-        self.cap = cv2.VideoCapture(0)
-        self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(min_detection_confidence=0.5, min_tracking_confidence=0.5)
-        self.mp_draw = mp.solutions.drawing_utils
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
+            elif event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE):
+                self.renderer.invalidate()  # window contents are gone, redraw everything
 
     def handle_hand_gestures(self):
-        ret, frame = self.cap.read()
-        if not ret:
-            return
-        frame = cv2.flip(frame, 1)
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.hands.process(rgb_frame)
-
-        if results.multi_hand_landmarks:
-            for hand_landmarks in results.multi_hand_landmarks:
-                self.mp_draw.draw_landmarks(frame, hand_landmarks, self.mp_hands.HAND_CONNECTIONS)
-                landmarks = hand_landmarks.landmark
-
-                index_finger_tip = landmarks[self.mp_hands.HandLandmark.INDEX_FINGER_TIP]
-                x, y = int(index_finger_tip.x * WIDTH), int(index_finger_tip.y * HEIGHT)
-
-                head_x, head_y = self.snake.body[0]
-                if abs(x - head_x) > abs(y - head_y):
-                    if x > head_x:
-                        self.snake.change_direction((CELL_SIZE, 0))  
-                    else:
-                        self.snake.change_direction((-CELL_SIZE, 0))
-                else:
-                    if y > head_y:
-                        self.snake.change_direction((0, CELL_SIZE)) 
-                    else:
-                        self.snake.change_direction((0, -CELL_SIZE))  
-
-        cv2.imshow("Hand Tracking", frame)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            self.running = False
+        if self.replay is not None:
+            landmarks = self.replay.next_landmarks()
+            if self.replay.finished:
+                self.running = False
+        else:
+            landmarks = self.track_hand()
+        if landmarks is not None:
+            self.steer(landmarks[INDEX_FINGER_TIP])
+
+    def track_hand(self):
+        """Newest landmarks from the gesture thread, or None; never waits for the camera"""
+        landmarks, _, sequence = self.gestures.latest()
+        if self.gestures.finished:
+            self.running = False  # camera closed or failed
+        # One record per tick, so a replay steers exactly like this game did
+        if self.recorder is not None:
+            self.recorder.write(time.perf_counter(), landmarks)
+
+        if self.preview:
+            frame = self.gestures.latest_frame()
+            if frame is not None and sequence != self.preview_sequence:
+                self.preview_sequence = sequence
+                cv2.imshow("Hand Tracking", frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                self.running = False
+        return landmarks
+
+    def steer(self, index_finger_tip):
+        x, y = int(index_finger_tip[0] * WIDTH), int(index_finger_tip[1] * HEIGHT)
+
+        head_x, head_y = (c * CELL_SIZE for c in self.game.body[0])
+        if abs(x - head_x) > abs(y - head_y):
+            self.action = RIGHT if x > head_x else LEFT
+        else:
+            self.action = DOWN if y > head_y else UP
 
     def update(self):
-        self.snake.move()
-        if self.snake.body[0] == self.food.position:
-            self.snake.grow()
-            self.food.respawn()
-            self.score += 1 
-        if self.snake.check_collision():
-            self.running = False
+        self.game.step(self.action)
+        self.action = None
+        if self.game_log is not None:
+            self.game_log.record(self.game.direction)
+        if self.game.done:
+            self.running = False  # crashed, or the snake fills the whole board
 
     def draw(self):
-        self.screen.fill(BLACK)
-        self.snake.draw(self.screen.screen)
-        self.food.draw(self.screen.screen)
-        self.screen.draw_text(f"Score: {self.score}", (10, 10))  
-        self.screen.update()
+        self.renderer.draw(self.game, f"Score: {self.game.score}")
 
     def run(self):
         while self.running:
             self.handle_events()
             self.handle_hand_gestures()
+            if not self.running:
+                break  # replay over, camera closed or quit: no tick without its input
             self.update()
             self.draw()
             self.screen.tick(10)
-        self.cap.release()
-        cv2.destroyAllWindows()
+        self.close()
+
+    def benchmark(self, frames, seed=0):
+        """Play ``frames`` ticks of the replay without frame pacing and time each stage.
+
+        The game restarts whenever the snake dies and the recording loops;
+        food placement is seeded so runs are repeatable.
+        """
+        self.game = SnakeLogic(COLS, ROWS, seed)  # every restart replays the same food
+        self.reset()
+        self.replay.loop = True
+        timer = FrameTimer()
+        timer.start()
+        while timer.frames < frames:
+            self.handle_events()
+            with timer.stage('update'):
+                self.handle_hand_gestures()
+                self.update()
+            with timer.stage('render'):
+                self.draw()
+            timer.frame_done()
+            if not self.running:
+                self.reset()
+        timer.stop()
+        self.close()
+        return timer.summary()
+
+    def close(self):
+        if self.gestures is not None:
+            self.gestures.stop()
+        if self.preview and self.replay is None:
+            cv2.destroyAllWindows()
+        if self.recorder is not None:
+            self.recorder.close()
+            print(f"Saved {self.recorder.records} landmark records")
+        if self.game_log is not None:
+            self.game_log.score = self.game.score
+            self.game_log.save(self.save_game)
+            print(f"Saved {self.game_log.ticks} ticks of game log to {self.save_game}")
         pygame.quit()
 
 if __name__ == "__main__":
-    gm = GameEngine()
-    gm.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Snake controlled by hand gestures")
+    parser.add_argument("--record", default=None, help="save the tracked landmarks to this file")
+    parser.add_argument("--replay", default=None,
+                        help="steer from a landmark recording instead of the webcam (no MediaPipe needed)")
+    parser.add_argument("--headless", action="store_true", help="render off-screen, no windows")
+    parser.add_argument("--no-preview", action="store_true", help="don't show the annotated camera window")
+    parser.add_argument("--inference-width", type=int, default=320,
+                        help="downscale camera frames to this width before hand tracking")
+    parser.add_argument("--benchmark", type=int, default=0, metavar="FRAMES",
+                        help="run FRAMES ticks of --replay unpaced and report update/render times")
+    parser.add_argument("--report", default=None, help="write the benchmark summary as JSON")
+    parser.add_argument("--seed", type=parse_seed, default=None,
+                        help="food placement seed (random unless given; 0 for --benchmark)")
+    parser.add_argument("--save-game", default=None, metavar="PATH",
+                        help="log the game (seed and turns) for game_log.py or snakegame2.py --watch")
+    args = parser.parse_args()
+    if args.benchmark and not args.replay:
+        parser.error("--benchmark needs --replay")
+    if args.benchmark and args.save_game:
+        parser.error("--save-game records a single game, not --benchmark")
+
+    gm = GameEngine(replay=args.replay, record=args.record, headless=args.headless,
+                    preview=not args.no_preview, inference_width=args.inference_width,
+                    seed=args.seed, save_game=args.save_game)
+    if args.benchmark:
+        summary = gm.benchmark(args.benchmark, seed=args.seed or 0)
+        print_summary(summary)
+        if args.report:
+            write_report(summary, args.report)
+    else:
+        gm.run()
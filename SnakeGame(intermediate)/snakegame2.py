@@ -1,6 +1,10 @@
+import argparse
 import pygame
 import random
 from pygame import RESIZABLE
+
+from game_log import GameLog, parse_seed, read_game
+from snake_logic import COLS, ROWS, UP, RIGHT, DOWN, LEFT, SnakeLogic
 # Constantsw
 WIDTH, HEIGHT = 1080, 720
 CELL_SIZE = 20  
@@ -22,75 +26,117 @@ class Screen:
     def tick(self, fps):
         self.clock.tick(fps)
 
-class Snake:
-    def __init__(self):
-        self.body = [(100, 100), (80, 100), (60, 100)]
-        self.direction = (CELL_SIZE, 0)
-
-    def move(self):
-        new_head = (self.body[0][0] + self.direction[0], self.body[0][1] + self.direction[1])
-        self.body.insert(0, new_head)
-        self.body.pop()
-
-    def grow(self):
-        self.body.append(self.body[-1])
-
-    def check_collision(self):
-        x, y = self.body[0]
-        return x < 0 or x >= WIDTH or y < 0 or y >= HEIGHT or self.body[0] in self.body[1:]
-
-    def change_direction(self, direction):
-        if (direction[0] != -self.direction[0] or direction[1] != -self.direction[1]):
-            self.direction = direction
-
-    def draw(self, screen):
-        for segment in self.body:
-            pygame.draw.rect(screen, GREEN, (*segment, CELL_SIZE, CELL_SIZE))
-
-class Food:
-    def __init__(self):
-        self.position = (random.randrange(0, WIDTH, CELL_SIZE), random.randrange(0, HEIGHT, CELL_SIZE))
+def cell_rect(cell):
+    """Window rectangle of a board cell"""
+    return pygame.Rect(cell[0] * CELL_SIZE, cell[1] * CELL_SIZE, CELL_SIZE, CELL_SIZE)
+
+class IncrementalRenderer:
+    """Redraws only the cells that changed since the previous frame.
+
+    After one move the only changes are the new head cell, the old tail cell
+    and, after eating, the old and new food cells.
+    Those rectangles are repainted and pushed with
+    ``pygame.display.update(rects)``, so frame cost doesn't depend on the
+    snake's length. The whole window is redrawn on the first frame, after a
+    reset, when more than one move happened, or after ``invalidate()``
+    (window resized or exposed).
+    """
+    def __init__(self, screen):
+        self.screen = screen
+        self.full = True
+        self.game = None
+        self.ticks = 0
+        self.tail = None
+        self.food = None
+
+    def invalidate(self):
+        self.full = True
+
+    def paint(self, cell, game):
+        """Repaint one cell from the current game state, return its rect"""
+        rect = cell_rect(cell)
+        if cell == game.food:
+            color = RED
+        elif cell in game.occupied:
+            color = GREEN
+        else:
+            color = BLACK
+        self.screen.screen.fill(color, rect)
+        return rect
+
+    def draw(self, game):
+        # A reset turns the tick counter back, a skipped frame moves it on by more than one
+        if self.full or game is not self.game or not 0 <= game.ticks - self.ticks <= 1:
+            self.redraw(game)
+            return
+
+        cells = {game.body[0], self.tail}
+        if game.food != self.food:
+            cells.update((self.food, game.food))
+        rects = [self.paint(cell, game) for cell in cells if cell is not None]
+        self.remember(game)
+        pygame.display.update(rects)
+
+    def redraw(self, game):
+        self.screen.fill(BLACK)
+        for cell in game.body:
+            self.screen.screen.fill(GREEN, cell_rect(cell))
+        if game.food is not None:
+            self.screen.screen.fill(RED, cell_rect(game.food))
+        self.screen.update()
+        self.full = False
+        self.remember(game)
 
-    def respawn(self):
-        self.position = (random.randrange(0, WIDTH, CELL_SIZE), random.randrange(0, HEIGHT, CELL_SIZE))
+    def remember(self, game):
+        self.game = game
+        self.ticks = game.ticks
+        self.tail = game.body[-1]
+        self.food = game.food
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, RED, (*self.position, CELL_SIZE, CELL_SIZE))
+KEYS = {pygame.K_w: UP, pygame.K_d: RIGHT, pygame.K_s: DOWN, pygame.K_a: LEFT}
 
 class GameEngine:
-    def __init__(self):
+    def __init__(self, seed=None, save_game=None, watch=None):
+        self.script = None  # directions to replay instead of the keyboard
+        if watch:
+            log = read_game(watch)
+            if (log.cols, log.rows) != (COLS, ROWS):
+                raise ValueError(f"{watch} was played on a {log.cols}x{log.rows} board")
+            seed = log.seed
+            self.script = log.directions()
+        self.seed = random.randrange(2 ** 32) if seed is None else seed
+        self.save_game = save_game
+        self.game_log = GameLog(self.seed) if save_game else None
         self.screen = Screen()
-        self.snake = Snake()
-        self.food = Food()
+        self.game = SnakeLogic(COLS, ROWS, self.seed)  # the rules; this class only steers and draws
+        self.action = None  # turn to take on the next tick
+        self.renderer = IncrementalRenderer(self.screen)
         self.running = True
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
-            elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_w:
-                    self.snake.change_direction((0, -CELL_SIZE))
-                elif event.key == pygame.K_s:
-                    self.snake.change_direction((0, CELL_SIZE))
-                elif event.key == pygame.K_a:
-                    self.snake.change_direction((-CELL_SIZE, 0))
-                elif event.key == pygame.K_d:
-                    self.snake.change_direction((CELL_SIZE, 0))
+            elif event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE):
+                self.renderer.invalidate()  # window contents are gone, redraw everything
+            elif event.type == pygame.KEYDOWN and self.script is None and event.key in KEYS:
+                self.action = KEYS[event.key]
 
     def update(self):
-        self.snake.move()
-        if self.snake.body[0] == self.food.position:
-            self.snake.grow()
-            self.food.respawn()
-        if self.snake.check_collision():
-            self.running = False
+        if self.script is not None:
+            self.action = next(self.script, None)
+            if self.action is None:
+                self.running = False  # end of the recording
+                return
+        self.game.step(self.action)
+        self.action = None
+        if self.game_log is not None:
+            self.game_log.record(self.game.direction)
+        if self.game.done:
+            self.running = False  # crashed, or the snake fills the whole board
 
     def draw(self):
-        self.screen.fill(BLACK)
-        self.snake.draw(self.screen.screen)
-        self.food.draw(self.screen.screen)
-        self.screen.update()
+        self.renderer.draw(self.game)
 
     def run(self):
         while self.running:
@@ -98,8 +144,18 @@ class GameEngine:
             self.update()
             self.draw()
             self.screen.tick(10)
+        if self.game_log is not None:
+            self.game_log.score = self.game.score
+            self.game_log.save(self.save_game)
+            print(f"Saved {self.game_log.ticks} ticks of game log to {self.save_game}")
         pygame.quit()
 
 if __name__ == "__main__":
-    gm = GameEngine()
+    parser = argparse.ArgumentParser(description="Snake with WASD controls")
+    parser.add_argument("--seed", type=parse_seed, default=None, help="food placement seed (random unless given)")
+    parser.add_argument("--save-game", default=None, metavar="PATH",
+                        help="log the game (seed and turns) for game_log.py or --watch")
+    parser.add_argument("--watch", default=None, metavar="PATH", help="play back a game log")
+    args = parser.parse_args()
+    gm = GameEngine(seed=args.seed, save_game=args.save_game, watch=args.watch)
     gm.run()